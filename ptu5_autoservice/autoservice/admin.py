@@ -1,10 +1,22 @@
 from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
 from . import models
+from . pagination import CachedCountPaginator
 
-class CarAdmin(admin.ModelAdmin):
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Change lists for tables with millions of rows: no full COUNT(*), cached filtered counts."""
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+class CarAdmin(LargeTableAdmin):
     list_display = ('plate_number', 'VIN_code', 'owner')
-    list_filter = ('car_model', 'owner')
-    search_fields = ('VIN_code', 'plate_number')
+    list_filter = ('car_model', )
+    search_fields = ('VIN_code', 'plate_number', 'owner')
+
+    def get_queryset(self, request):
+        # Car.__str__ shows the model, e.g. in autocomplete results.
+        return super().get_queryset(request).select_related('car_model')
 
 class ServiceAdmin(admin.ModelAdmin):
     list_display = ('name', 'price')
@@ -14,25 +26,56 @@ class OrderLineInLine(admin.TabularInline):
     extra = 0
     can_delete = False
 
-class OrderAdmin(admin.ModelAdmin):
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('service')
+
+class OverdueFilter(admin.SimpleListFilter):
+    title = _('overdue')
+    parameter_name = 'overdue'
+
+    def lookups(self, request, model_admin):
+        return (('yes', _('Yes')), ('no', _('No')))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(overdue=True)
+        if self.value() == 'no':
+            return queryset.filter(overdue=False)
+
+class OrderAdmin(LargeTableAdmin):
     list_display = ('date', 'total_sum', 'car', 'status', 'estimate_date', 'is_overdue', 'reader')
+    list_filter = ('status', OverdueFilter)
+    list_select_related = ('car__car_model', 'reader')
     inlines = (OrderLineInLine, )
-    readonly_fields = ('date',)
+    readonly_fields = ('date', 'total_sum')
     list_editable = ('estimate_date', 'reader')
+    autocomplete_fields = ('car', )
+    raw_id_fields = ('reader', )
 
     fieldsets = (
         ('Car', {'fields': ('car', 'total_sum', 'status', 'estimate_date')}),
         ('Date', {'fields': ('date',)})
     )
 
-class OrderLineAdmin(admin.ModelAdmin):
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_overdue()
+
+    @admin.display(description=_('overdue'), boolean=True, ordering='overdue')
+    def is_overdue(self, obj):
+        return obj.is_overdue
+
+class OrderLineAdmin(LargeTableAdmin):
     list_display = ('service', 'quantity', 'price', 'total_sum', 'order')
     ordering = ('order', 'id')
-    list_filter = ('order', )
+    list_filter = ('service', )
+    list_select_related = ('service', 'order__car')
+    raw_id_fields = ('order', )
 
 
-class OrderReviewAdmin(admin.ModelAdmin):
+class OrderReviewAdmin(LargeTableAdmin):
     list_display = ('order', 'owner', 'created_at')
+    list_select_related = ('order__car', 'owner')
+    raw_id_fields = ('order', 'owner')
 
 # Register your models here.
 admin.site.register(models.Car, CarAdmin)
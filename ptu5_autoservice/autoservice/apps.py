@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AutoserviceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'autoservice'
+
+    def ready(self):
+        from . signals import (
+            update_order_total, update_order_total_on_delete, count_created, count_deleted, invalidate_cached_content
+        )
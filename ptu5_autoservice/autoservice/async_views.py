@@ -0,0 +1,91 @@
+"""Async versions of the read-heavy pages, served instead of the views in views.py
+when AUTOSERVICE_ASYNC_VIEWS is on, which only pays off under ASGI.
+
+Queries go through the async ORM, so the event loop only hands single queries to
+the ORM thread instead of running whole views in it. Templates still render
+synchronously through sync_to_async, as the auth context processor and the lazy
+review chunks may query the database.
+"""
+import asyncio
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import render
+from . models import Car, Order, OrderReview
+from .caching import aget_version
+from .counters import aget_counts, record_visit
+from .forms import OrderReviewForm
+from .mixins import CachedObjectMixin
+from .pagination import CursorPaginator, acached_count, apaginate, cursor_pagination_enabled
+from .reviews import ReviewChunk, page_number
+from .views import OrderDetailView, OrderlistView
+
+arender = sync_to_async(render)
+order_detail_view = sync_to_async(OrderDetailView.as_view())
+
+
+async def index(request):
+    context, visits_count = await asyncio.gather(aget_counts(), sync_to_async(record_visit)(request))
+    context['visits_count'] = visits_count
+    return await arender(request, 'autoservice/index.html', context)
+
+
+async def cars(request):
+    queryset = Car.objects.select_related('car_model')
+    if cursor_pagination_enabled():
+        paged_cars = await CursorPaginator(queryset, 3, ordering=('id', )).apage(request.GET.get('cursor'))
+    else:
+        paged_cars = await apaginate(queryset.order_by('id'), 3, request.GET.get('page'))
+    return await arender(request, 'autoservice/cars.html', {
+        'cars': paged_cars,
+        'cache_version': await aget_version(Car),
+    })
+
+
+async def car_info(request, car_id):
+    try:
+        car = await Car.objects.select_related('car_model').aget(id=car_id)
+    except Car.DoesNotExist:
+        raise Http404
+    return await arender(request, 'autoservice/car_info.html', {'car': car, 'cache_version': await aget_version(Car)})
+
+
+async def order_list(request):
+    view = OrderlistView()
+    view.setup(request)
+    queryset = view.get_queryset()
+    if cursor_pagination_enabled():
+        page = await CursorPaginator(queryset, view.paginate_by, view.cursor_ordering).apage(request.GET.get('cursor'))
+        orders_count = await acached_count(queryset)
+    else:
+        page = await apaginate(queryset, view.paginate_by, request.GET.get('page'))
+        orders_count = page.paginator.count
+    return await arender(request, view.template_name, {
+        'paginator': page.paginator,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'object_list': page.object_list,
+        'order_list': page.object_list,
+        'orders_count': orders_count,
+    })
+
+
+async def order_detail(request, pk):
+    if request.method != 'GET':
+        # Posting reviews stays in the sync view with its rate limit and messages.
+        return await order_detail_view(request, pk=pk)
+    try:
+        order = await Order.objects.select_related(
+            *CachedObjectMixin.object_select_related
+        ).prefetch_related('order_lines__service').aget(pk=pk)
+    except Order.DoesNotExist:
+        raise Http404
+    review_chunk = ReviewChunk(order.id, page_number(request.GET.get('reviews_page')))
+    if not await sync_to_async(review_chunk.exists)():
+        raise Http404
+    return await arender(request, OrderDetailView.template_name, {
+        'order': order,
+        'object': order,
+        'form': OrderReviewForm(initial={'order': order, 'owner': request.user}),
+        'review_chunk': review_chunk,
+        'reviews_cache_version': await aget_version(OrderReview),
+    })
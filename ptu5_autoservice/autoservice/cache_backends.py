@@ -0,0 +1,80 @@
+"""Django cache backends that count their hits and misses.
+
+They behave exactly like the stock backends they extend, CACHES in settings.py
+picks one of them with the CACHE_BACKEND environment variable.
+"""
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from django.core.cache.backends import filebased, locmem, redis
+
+_missing = object()
+_lock = threading.Lock()
+metrics = {}
+_request_counter = ContextVar('cache_request_counter', default=None)
+
+
+def record(name, hits=0, misses=0):
+    with _lock:
+        counter = metrics.setdefault(name, Counter())
+        counter['hits'] += hits
+        counter['misses'] += misses
+    counter = _request_counter.get()
+    if counter is not None:
+        counter['hits'] += hits
+        counter['misses'] += misses
+
+
+def begin_request():
+    """Also counts hits and misses of the current request, across all caches, until end_request()."""
+    counter = Counter()
+    return counter, _request_counter.set(counter)
+
+
+def end_request(token):
+    _request_counter.reset(token)
+
+
+def get_metrics():
+    with _lock:
+        return {
+            name: dict(counter, hit_rate=round(counter['hits'] / max(counter['hits'] + counter['misses'], 1), 3))
+            for name, counter in metrics.items()
+        }
+
+
+def reset_metrics():
+    with _lock:
+        metrics.clear()
+
+
+class MetricsMixin:
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.metrics_name = params.get('METRICS_NAME') or location or self.__class__.__name__
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version=version)
+        if value is _missing:
+            record(self.metrics_name, misses=1)
+            return default
+        record(self.metrics_name, hits=1)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version)
+        record(self.metrics_name, hits=len(values), misses=len(keys) - len(values))
+        return values
+
+
+class LocMemCache(MetricsMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(MetricsMixin, filebased.FileBasedCache):
+    pass
+
+
+class RedisCache(MetricsMixin, redis.RedisCache):
+    pass
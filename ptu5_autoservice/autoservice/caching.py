@@ -0,0 +1,58 @@
+import time
+from django.core.cache import cache
+from user_profile.models import Profile
+from . models import Car, CarModel, Order, OrderLine, OrderReview, Service
+
+# Changes of the key model invalidate cached content of the listed models.
+CACHE_DEPENDENCIES = {
+    Car: (Car, ),
+    CarModel: (Car, ),
+    Order: (Order, ),
+    OrderLine: (Order, ),
+    OrderReview: (OrderReview, ),
+    Profile: (OrderReview, ),
+    Service: (Service, ),
+}
+
+
+def version_key(model):
+    return f'version:{model._meta.label_lower}'
+
+
+def new_version():
+    # Starting from the clock keeps versions growing when a key is evicted.
+    return time.time_ns() // 1000
+
+
+def get_version(*models):
+    """Returns one version string for cache keys that depend on all of models."""
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+async def aget_version(*models):
+    """get_version() for async views."""
+    keys = [version_key(model) for model in models]
+    versions = await cache.aget_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, None)
+        versions.update(missing)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def invalidate(model):
+    try:
+        cache.incr(version_key(model))
+    except ValueError:
+        cache.set(version_key(model), new_version(), None)
+
+
+def invalidate_dependents(sender):
+    for model in CACHE_DEPENDENCIES.get(sender, ()):
+        invalidate(model)
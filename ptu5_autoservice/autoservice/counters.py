@@ -0,0 +1,75 @@
+import asyncio
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from . models import Car, Order, Service
+
+COUNTED_MODELS = {
+    'service_count': Service,
+    'order_count': Order,
+    'car_count': Car,
+}
+
+
+def counter_key(model):
+    return f'counter:{model._meta.label_lower}'
+
+
+def get_counts():
+    """Returns the dashboard totals from the cache, counting the missing ones in one query."""
+    keys = {name: counter_key(model) for name, model in COUNTED_MODELS.items()}
+    counts = cache.get_many(keys.values())
+    missing = [name for name, key in keys.items() if key not in counts]
+    if missing:
+        subqueries = ', '.join(
+            f'(SELECT COUNT(*) FROM {connection.ops.quote_name(COUNTED_MODELS[name]._meta.db_table)})'
+            for name in missing
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT {subqueries}')
+            fresh = dict(zip((keys[name] for name in missing), cursor.fetchone()))
+        cache.set_many(fresh, settings.COUNTER_CACHE_TIMEOUT)
+        counts.update(fresh)
+    return {name: counts[key] for name, key in keys.items()}
+
+
+async def aget_counts():
+    """get_counts() for async views, counting the missing totals concurrently."""
+    keys = {name: counter_key(model) for name, model in COUNTED_MODELS.items()}
+    counts = await cache.aget_many(keys.values())
+    missing = [name for name, key in keys.items() if key not in counts]
+    if missing:
+        totals = await asyncio.gather(*(COUNTED_MODELS[name].objects.acount() for name in missing))
+        fresh = dict(zip((keys[name] for name in missing), totals))
+        await cache.aset_many(fresh, settings.COUNTER_CACHE_TIMEOUT)
+        counts.update(fresh)
+    return {name: counts[key] for name, key in keys.items()}
+
+
+def change_count(model, delta):
+    try:
+        cache.incr(counter_key(model), delta)
+    except ValueError:
+        # Not cached yet, the next get_counts() will count it.
+        pass
+
+
+def record_visit(request):
+    """Counts a visit of this session and returns the count before it.
+
+    Counts live in the cache and are written to the session only every
+    VISITS_FLUSH_EVERY visits, so repeated visits do not update the session row.
+    """
+    session = request.session
+    if not session.session_key:
+        visits = session.get('visits_count', 1)
+        session['visits_count'] = visits + 1
+        return visits
+    key = f'visits:{session.session_key}'
+    visits = cache.get(key)
+    if visits is None:
+        visits = session.get('visits_count', 1)
+    cache.set(key, visits + 1, settings.SESSION_COOKIE_AGE)
+    if (visits + 1) % settings.VISITS_FLUSH_EVERY == 0:
+        session['visits_count'] = visits + 1
+    return visits
@@ -0,0 +1,91 @@
+"""Streaming export of orders with their car, lines and totals.
+
+Orders are read with QuerySet.iterator(chunk_size=...), which uses a server-side
+cursor where the database supports it, and every chunk prefetches its own order
+lines, so memory use does not grow with the number of exported orders.
+"""
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date
+from . search import search_orders
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+CSV_COLUMNS = (
+    'id', 'date', 'status', 'estimate_date', 'total_sum', 'plate_number', 'vin', 'owner', 'car_model', 'lines',
+)
+CHUNK_SIZE = 2000
+
+
+def parse_day(value):
+    """Returns the date of a YYYY-MM-DD string, raises ValueError for anything else."""
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f'{value!r} is not a YYYY-MM-DD date')
+    return day
+
+
+def filter_orders(queryset, search=None, date_from=None, date_to=None, status=None):
+    """Applies the order list search and the export filters, dates as date objects."""
+    if search:
+        queryset = search_orders(queryset, search, ranked=False)
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE):
+    queryset = queryset.select_related('car__car_model').prefetch_related('order_lines__service').order_by('id')
+    for order in queryset.iterator(chunk_size=chunk_size):
+        car = order.car
+        yield {
+            'id': order.id,
+            'date': order.date,
+            'status': order.status,
+            'estimate_date': order.estimate_date,
+            'total_sum': order.total_sum,
+            'plate_number': car.plate_number,
+            'vin': car.VIN_code,
+            'owner': car.owner,
+            'car_model': f'{car.car_model.make} {car.car_model.model}',
+            'lines': [{
+                'service': line.service.name,
+                'quantity': line.quantity,
+                'price': line.price,
+                'total_sum': line.total_sum,
+            } for line in order.order_lines.all()],
+        }
+
+
+class Echo:
+    """File-like object for csv.writer that hands each line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        row['lines'] = '; '.join(
+            f"{line['service']} x {line['quantity']} @ {line['price']}" for line in row['lines']
+        )
+        yield writer.writerow([row[column] for column in CSV_COLUMNS])
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def export_lines(queryset, file_format):
+    rows = export_rows(queryset)
+    return csv_lines(rows) if file_format == 'csv' else jsonl_lines(rows)
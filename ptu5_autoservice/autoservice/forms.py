@@ -1,17 +1,8 @@
 from django import forms
-from . models import OrderReview, Order
-from django.utils.timezone import datetime, timedelta
+from . models import OrderReview, Order, Car
 
 
 class OrderReviewForm(forms.ModelForm):
-    def is_valid(self):
-        valid = super().is_valid()
-        if valid:
-            owner = self.cleaned_data.get("owner")
-            recent_posts = OrderReview.objects.filter(owner=owner, created_at__gte=(datetime.now() - timedelta(minutes=1)))
-            if recent_posts:
-                return False
-        return valid
     class Meta:
         model = OrderReview
         fields = ('content', 'order', 'owner')
@@ -31,6 +22,10 @@ class UserOrderForm(forms.ModelForm):
         fields = ('car', 'estimate_date',)
         widgets = {'estimate_date': DateInput()}
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['car'].queryset = Car.objects.select_related('car_model')
+
 
 class UserOrderUpdateForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,177 @@
+"""Bulk import of cars, orders and order lines from CSV or JSON Lines.
+
+Every row is one order line:
+
+    order, vin, plate_number, owner, car_model, status, estimate_date, service, quantity, price
+
+Rows of one order share the same required ``order`` reference and have to
+follow each other. Car columns are only used when the VIN is not known yet, ``car_model``
+and ``service`` are primary keys, ``price`` defaults to the service price and a
+row without ``service`` imports an order without lines. Rows are streamed and
+written with bulk_create in one transaction per batch, order totals are summed
+while reading instead of being recomputed by the database.
+"""
+import csv
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from . caching import invalidate
+from . counters import change_count
+from . export import parse_day
+from . reports import schedule_refresh
+from . models import Car, CarModel, Order, OrderLine, Service
+
+FORMATS = ('csv', 'jsonl')
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def read_rows(lines, file_format):
+    """Yields rows as dicts from an iterable of text lines, e.g. an open file."""
+    if file_format == 'csv':
+        yield from csv.DictReader(lines)
+    elif file_format == 'jsonl':
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f'Unknown import format {file_format!r}, use one of {", ".join(FORMATS)}')
+
+
+def format_from_name(name):
+    return 'jsonl' if name.endswith(('.jsonl', '.json', '.ndjson')) else 'csv'
+
+
+class OrderImporter:
+    def __init__(self, batch_size=5000):
+        self.batch_size = batch_size
+        self.service_prices = dict(Service.objects.values_list('id', 'price'))
+        self.stats = Counter()
+        self.row_number = 0
+        self.statuses = {status for status, label in Order.STATUS_CHOICES}
+
+    def run(self, rows):
+        batch = []
+        for row in rows:
+            self.row_number += 1
+            if not isinstance(row, dict):
+                raise ImportRowError(f'Row {self.row_number}: expected an object with column names')
+            if row.get('order') in (None, ''):
+                raise ImportRowError(f'Row {self.row_number}: order is required')
+            if len(batch) >= self.batch_size and row.get('order') != batch[-1][1].get('order'):
+                self.import_batch(batch)
+                batch = []
+            batch.append((self.row_number, row))
+        if batch:
+            self.import_batch(batch)
+        return dict(self.stats)
+
+    def import_batch(self, batch):
+        with transaction.atomic():
+            car_ids, new_cars = self.import_cars(batch)
+            groups = {}
+            for number, row in batch:
+                groups.setdefault(row.get('order'), []).append((number, row))
+            orders, order_lines = [], []
+            for group in groups.values():
+                number, first = group[0]
+                lines = [self.build_line(number, row) for number, row in group if row.get('service')]
+                orders.append(Order(
+                    car_id=car_ids[first['vin']],
+                    status=first.get('status') or 'n',
+                    estimate_date=self.parse_estimate_date(number, first),
+                    total_sum=sum((line.quantity * line.price for line in lines), Decimal(0)),
+                ))
+                order_lines.append(lines)
+            orders = Order.objects.bulk_create(orders)
+            for order, lines in zip(orders, order_lines):
+                for line in lines:
+                    line.order_id = order.pk
+            OrderLine.objects.bulk_create(
+                [line for lines in order_lines for line in lines], update_totals=False
+            )
+            schedule_refresh({order.date for order in orders})
+        # Only committed batches count, a later failing batch does not undo them.
+        if new_cars:
+            change_count(Car, new_cars)
+            invalidate(Car)
+        change_count(Order, len(orders))
+        invalidate(Order)
+        self.stats['cars'] += new_cars
+        self.stats['orders'] += len(orders)
+        self.stats['order_lines'] += sum(len(lines) for lines in order_lines)
+        self.stats['rows'] += len(batch)
+
+    def import_cars(self, batch):
+        for number, row in batch:
+            if not row.get('vin'):
+                raise ImportRowError(f'Row {number}: vin is required')
+            row['vin'] = str(row['vin'])
+            if row.get('status') and row['status'] not in self.statuses:
+                raise ImportRowError(f"Row {number}: unknown status {row['status']!r}")
+        vins = {row['vin'] for number, row in batch}
+        car_ids = dict(Car.objects.filter(VIN_code__in=vins).values_list('VIN_code', 'id'))
+        new_cars = {}
+        for number, row in batch:
+            vin = row['vin']
+            if vin in car_ids or vin in new_cars:
+                continue
+            if not row.get('car_model'):
+                raise ImportRowError(f'Row {number}: car_model is required for the new car {vin}')
+            try:
+                car_model_id = int(row['car_model'])
+            except (TypeError, ValueError):
+                raise ImportRowError(f"Row {number}: invalid car_model {row['car_model']!r}")
+            new_cars[vin] = (number, Car(
+                VIN_code=vin,
+                plate_number=row.get('plate_number', ''),
+                owner=row.get('owner', ''),
+                car_model_id=car_model_id,
+            ))
+            self.validate_car(number, new_cars[vin][1])
+        known_models = set(CarModel.objects.filter(
+            pk__in={car.car_model_id for number, car in new_cars.values()}
+        ).values_list('pk', flat=True))
+        for number, car in new_cars.values():
+            if car.car_model_id not in known_models:
+                raise ImportRowError(f'Row {number}: unknown car_model {car.car_model_id}')
+        if new_cars:
+            Car.objects.bulk_create(car for number, car in new_cars.values())
+            car_ids.update(Car.objects.filter(VIN_code__in=new_cars).values_list('VIN_code', 'id'))
+        return car_ids, len(new_cars)
+
+    def validate_car(self, number, car):
+        # Plate number and owner may be left out, the rest has to fit the columns.
+        exclude = ['car_model'] + [name for name in ('plate_number', 'owner') if not getattr(car, name)]
+        try:
+            car.clean_fields(exclude=exclude)
+        except ValidationError as error:
+            problems = '; '.join(f'{name} {" ".join(messages)}' for name, messages in error.message_dict.items())
+            raise ImportRowError(f'Row {number}: {problems}')
+
+    def parse_estimate_date(self, number, row):
+        if not row.get('estimate_date'):
+            return None
+        try:
+            return parse_day(str(row['estimate_date']))
+        except ValueError:
+            raise ImportRowError(f"Row {number}: invalid estimate_date {row['estimate_date']!r}, use YYYY-MM-DD")
+
+    def build_line(self, number, row):
+        try:
+            service_id = int(row['service'])
+            quantity = Decimal(str(row.get('quantity') or 1))
+            price = Decimal(str(row['price'])) if row.get('price') not in (None, '') else self.service_prices[service_id]
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            raise ImportRowError(f'Row {number}: invalid service, quantity or price')
+        if service_id not in self.service_prices:
+            raise ImportRowError(f'Row {number}: unknown service {service_id}')
+        if not quantity.is_finite() or quantity < 1 or quantity != quantity.to_integral_value():
+            raise ImportRowError(f"Row {number}: quantity has to be a positive whole number, not {row['quantity']!r}")
+        if not price.is_finite() or price < 0:
+            raise ImportRowError(f"Row {number}: price has to be 0 or more, not {row['price']!r}")
+        return OrderLine(service_id=service_id, quantity=int(quantity), price=price)
@@ -0,0 +1,163 @@
+import json
+import statistics
+import time
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver, reverse
+from autoservice.models import Car, Order, Service
+
+URLCONFS = ('autoservice.urls', 'user_profile.urls')
+
+# How to request every route of URLCONFS: who asks, the URL arguments and the POST data.
+ROUTES = {
+    'index': {},
+    'cars': {},
+    'car_info': {'args': lambda data: (data['car'].pk, )},
+    'orders': {},
+    'import_orders': {'login': True, 'post': lambda data: {'file': data['import_file']()}},
+    'export_orders': {'login': True},
+    'order': {'args': lambda data: (data['order'].pk, )},
+    'order_reviews': {'args': lambda data: (data['order'].pk, )},
+    'user_orders': {'login': True},
+    'user_order_create': {'login': True},
+    'user_order_update': {'login': True, 'args': lambda data: (data['order'].pk, )},
+    'user_order_delete': {'login': True, 'args': lambda data: (data['order'].pk, )},
+    'report_orders': {'login': True},
+    'report_revenue': {'login': True},
+    'report_overdue': {'login': True},
+    'cache_metrics': {'login': True},
+    'performance_metrics': {'login': True},
+    'register': {},
+    'profile': {'login': True},
+    'update_profile': {'login': True},
+}
+
+
+def route_names():
+    for urlconf in URLCONFS:
+        for pattern in get_resolver(urlconf).url_patterns:
+            yield pattern.name
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Requests every autoservice and user_profile route through the test client, reports throughput, '
+        'p50/p95 latency and queries per route and compares them with a saved baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('routes', nargs='*', help='Route names to run, all by default.')
+        parser.add_argument('--repeat', type=int, default=20, help='Measured requests per route.')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per route.')
+        parser.add_argument('--baseline', help='Compare with results saved by --save-baseline.')
+        parser.add_argument('--save-baseline', help='Save the results as JSON.')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+            help='Allowed p50 slowdown against the baseline, 0.5 is 50%%.')
+
+    def handle(self, *args, **options):
+        missing = [name for name in route_names() if name not in ROUTES]
+        if missing:
+            raise CommandError(f'No benchmark request for routes: {", ".join(missing)}')
+        names = options['routes'] or list(route_names())
+        unknown = set(names) - set(ROUTES)
+        if unknown:
+            raise CommandError(f'Unknown routes: {", ".join(sorted(unknown))}')
+        baseline = json.loads(Path(options['baseline']).read_text())['routes'] if options['baseline'] else {}
+
+        results = {}
+        # Requests may write, the data goes back to how it was after the run. The cache is a
+        # separate locmem one, so cached counts and versions do not keep the rolled back writes.
+        caches = {'default': {**settings.CACHE_BACKENDS['locmem'], 'LOCATION': 'benchmark'}}
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver'], CACHES=caches):
+            data = self.prepare()
+            self.stdout.write(f"Orders: {data['orders']}, cars: {data['cars']}")
+            for name in names:
+                results[name] = self.measure(name, data, options['repeat'], options['warmup'])
+                self.report(name, results[name], baseline.get(name), options['tolerance'])
+            transaction.set_rollback(True)
+
+        if options['save_baseline']:
+            Path(options['save_baseline']).write_text(json.dumps({'routes': results}, indent=2))
+            self.stdout.write(f"Saved baseline to {options['save_baseline']}")
+        failed = [name for name, result in results.items() if result['status'] >= 400]
+        regressed = [name for name, result in results.items() if result.get('regression')]
+        if failed or regressed:
+            raise CommandError(
+                f'Failed: {", ".join(failed) or "none"}. Regressed: {", ".join(regressed) or "none"}.'
+            )
+
+    def prepare(self):
+        order = (
+            Order.objects.filter(order_lines__isnull=False, reviews__isnull=False).order_by('-pk').first()
+            or Order.objects.order_by('-pk').first()
+        )
+        if order is None:
+            raise CommandError('There are no orders, create some with the generate_data command.')
+        user, created = get_user_model().objects.update_or_create(username='benchmark', defaults={'is_staff': True})
+        Order.objects.filter(pk=order.pk).update(reader=user)
+        service = Service.objects.order_by('pk').first()
+
+        def import_file():
+            row = f"order,vin,service,quantity\nbenchmark,{order.car.VIN_code},{service.pk if service else ''},1\n"
+            return ContentFile(row.encode(), name='benchmark.csv')
+
+        self.clients = {False: Client(), True: Client()}
+        self.clients[True].force_login(user)
+        return {
+            'order': order, 'car': order.car, 'import_file': import_file,
+            'orders': Order.objects.count(), 'cars': Car.objects.count(),
+        }
+
+    def measure(self, name, data, repeat, warmup):
+        route = ROUTES[name]
+        client = self.clients[route.get('login', False)]
+        url = reverse(name, args=route['args'](data) if 'args' in route else ())
+        latencies, queries, status = [], [], 200
+        for number in range(warmup + repeat):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                if 'post' in route:
+                    response = client.post(url, route['post'](data))
+                else:
+                    response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            status = max(status, response.status_code)
+            if number >= warmup:
+                latencies.append(elapsed)
+                queries.append(len(context.captured_queries))
+        return {
+            'path': url,
+            'status': status,
+            'rps': round(len(latencies) / sum(latencies), 1),
+            'p50_ms': round(statistics.median(latencies) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'queries': max(queries),
+        }
+
+    def report(self, name, result, baseline, tolerance):
+        line = (
+            f"{name:<20} {result['status']} {result['rps']:>8.1f} req/s  p50 {result['p50_ms']:>8.2f} ms  "
+            f"p95 {result['p95_ms']:>8.2f} ms  queries {result['queries']:>3}"
+        )
+        if baseline:
+            change = result['p50_ms'] / max(baseline['p50_ms'], 0.01) - 1
+            line += f"  p50 {change:+.0%}  queries {result['queries'] - baseline['queries']:+d}"
+            # Latency is noisy, a few milliseconds either way are not a regression, one more query is.
+            slower = change > tolerance and result['p50_ms'] - baseline['p50_ms'] > 2
+            if slower or result['queries'] > baseline['queries']:
+                result['regression'] = True
+                line += '  REGRESSION'
+        self.stdout.write(line, self.style.ERROR if result['status'] >= 400 or result.get('regression') else None)
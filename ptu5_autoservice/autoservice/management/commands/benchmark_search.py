@@ -0,0 +1,67 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from autoservice.models import CarModel, Car, Order
+from autoservice.search import icontains_filter, search_orders
+
+
+class Command(BaseCommand):
+    help = 'Measures order search latency of the full-text index against plain icontains filters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-orders', type=int, default=0,
+            help='Insert this many synthetic orders for the run and roll them back afterwards.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=3)
+        parser.add_argument('terms', nargs='*', default=['Jonaitis', 'LT0421', 'WVW9999', 'Octavia'])
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed_orders']:
+                self.seed(options['seed_orders'])
+            self.stdout.write(f'Orders: {Order.objects.count()}')
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def seed(self, count, batch_size=5000):
+        models = CarModel.objects.bulk_create(
+            CarModel(year=2000 + n % 20, make=make, model=model, engine='1.9')
+            for n, (make, model) in enumerate([('Skoda', 'Octavia'), ('VW', 'Golf'), ('Audi', 'A4'), ('BMW', '320d')])
+        )
+        car_count = max(count // 2, 1)
+        for start in range(0, car_count, batch_size):
+            Car.objects.bulk_create(
+                Car(
+                    car_model=models[n % len(models)],
+                    plate_number=f'LT{n:06d}',
+                    VIN_code=f'WVW{n:014d}',
+                    owner=f'Owner {n} Jonaitis' if n % 1000 == 0 else f'Owner {n}',
+                ) for n in range(start, min(start + batch_size, car_count))
+            )
+        car_ids = list(Car.objects.values_list('id', flat=True))
+        for start in range(0, count, batch_size):
+            Order.objects.bulk_create(
+                Order(car_id=car_ids[n % len(car_ids)]) for n in range(start, min(start + batch_size, count))
+            )
+
+    def run(self, options):
+        engines = {
+            'index': lambda term: search_orders(Order.objects.all(), term),
+            'icontains': lambda term: Order.objects.filter(icontains_filter(term)).order_by('id'),
+        }
+        for name, search in engines.items():
+            timings = []
+            for term in options['terms']:
+                term_timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    list(search(term)[:options['page_size']])
+                    term_timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(f'{name:>10} {term!r}: p50 {statistics.median(term_timings):.2f} ms')
+                timings += term_timings
+            timings.sort()
+            p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+            self.stdout.write(
+                f'{name:>10}: p50 {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms, max {timings[-1]:.2f} ms'
+            )
@@ -0,0 +1,22 @@
+import time
+from importlib import import_module
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from autoservice import sessions
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired database sessions in batches, keeping each delete short.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not issubclass(store, sessions.SessionStore):
+            raise CommandError(f'{settings.SESSION_ENGINE} does not clear sessions in batches, use clearsessions.')
+        started = time.perf_counter()
+        deleted = store.clear_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired sessions in {time.perf_counter() - started:.2f}s.'
+        ))
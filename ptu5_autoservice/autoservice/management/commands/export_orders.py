@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from autoservice.export import FORMATS, export_lines, filter_orders, parse_day
+from autoservice.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Streams orders with their lines and totals as CSV or JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='File to write, standard output by default.')
+        parser.add_argument('--search')
+        parser.add_argument('--date-from', type=parse_day, help='YYYY-MM-DD')
+        parser.add_argument('--date-to', type=parse_day, help='YYYY-MM-DD')
+        parser.add_argument('--status', choices=[status for status, label in Order.STATUS_CHOICES])
+
+    def handle(self, *args, **options):
+        queryset = filter_orders(
+            Order.objects.all(),
+            search=options['search'],
+            date_from=options['date_from'],
+            date_to=options['date_to'],
+            status=options['status'],
+        )
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else self.stdout
+        try:
+            for line in export_lines(queryset, options['format']):
+                output.write(line)
+        finally:
+            if options['output']:
+                output.close()
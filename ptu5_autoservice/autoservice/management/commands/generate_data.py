@@ -0,0 +1,205 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from autoservice.caching import invalidate_dependents
+from autoservice.counters import COUNTED_MODELS, change_count
+from autoservice.models import CarModel, Car, Service, Order, OrderLine, OrderReview
+from autoservice.reports import schedule_refresh
+from user_profile.models import Profile
+
+MAKES = {
+    'Audi': ['A3', 'A4', 'A6', 'Q5'],
+    'BMW': ['320d', '520d', 'X3', 'X5'],
+    'Skoda': ['Fabia', 'Octavia', 'Superb', 'Kodiaq'],
+    'Toyota': ['Corolla', 'Avensis', 'RAV4', 'Prius'],
+    'VW': ['Golf', 'Passat', 'Tiguan', 'Touran'],
+}
+ENGINES = ['1.4 TSI', '1.6 TDI', '1.9 TDI', '2.0 TDI', '2.0 TFSI', '1.8 Hybrid', '3.0d']
+SERVICES = [
+    'Oil change', 'Brake pads', 'Brake discs', 'Timing belt', 'Wheel alignment', 'Tyre change', 'Diagnostics',
+    'Air conditioning', 'Battery', 'Clutch', 'Suspension', 'Exhaust', 'Spark plugs', 'Coolant', 'Headlights',
+]
+PLATE_LETTERS = 'ABCDEFGHJKLMNPRSTUVZ'
+FIRST_NAMES = ['Jonas', 'Petras', 'Ona', 'Rasa', 'Tomas', 'Ieva', 'Mantas', 'Greta', 'Lukas', 'Austeja']
+LAST_NAMES = ['Jonaitis', 'Petraitis', 'Kazlauskas', 'Stankevicius', 'Vasiliauskas', 'Zukauskas', 'Butkus']
+# Roughly what a workshop has on its books, most orders are finished.
+STATUS_WEIGHTS = {'n': 5, 'a': 5, 'o': 5, 'w': 10, 'd': 15, 'c': 5, 'p': 55}
+REVIEWS = ['Fast service', 'Fair price, friendly staff.', 'Took longer than promised.', 'Car runs like new!']
+
+
+def next_number(model):
+    # Numbering names after the highest primary key keeps them unique across runs.
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = 'Bulk inserts reproducible synthetic users, cars, services, orders, order lines and reviews.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1, help='Multiplies every default count.')
+        parser.add_argument('--users', type=int, help='Users with profiles, 50 per scale unit.')
+        parser.add_argument('--car-models', type=int, help='20 per scale unit.')
+        parser.add_argument('--cars', type=int, help='500 per scale unit.')
+        parser.add_argument('--services', type=int, help='Up to 15 named services, then numbered ones.')
+        parser.add_argument('--orders', type=int, help='2000 per scale unit.')
+        parser.add_argument('--lines-per-order', type=int, default=4, help='Orders get 1 to N lines.')
+        parser.add_argument('--reviews', type=float, default=0.2, help='Share of orders with a review.')
+        parser.add_argument('--days', type=int, default=365, help='Spread order dates over this many days.')
+        parser.add_argument('--password', default='secret-pass-123', help='Password of every generated user.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        counts = {
+            'users': options['users'] if options['users'] is not None else int(50 * scale),
+            'car_models': options['car_models'] if options['car_models'] is not None else max(int(20 * scale), 1),
+            'cars': options['cars'] if options['cars'] is not None else max(int(500 * scale), 1),
+            'services': options['services'] if options['services'] is not None else len(SERVICES),
+            'orders': options['orders'] if options['orders'] is not None else int(2000 * scale),
+        }
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.today = timezone.localdate()
+
+        user_ids = self.create_users(counts['users'], options['password'])
+        car_model_ids = self.create_car_models(counts['car_models'])
+        car_ids = self.create_cars(counts['cars'], car_model_ids)
+        prices = self.create_services(counts['services'])
+        stats = self.create_orders(counts['orders'], car_ids, user_ids, prices, options)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(user_ids)} users, {len(car_model_ids)} car models, {len(car_ids)} cars, "
+            f"{len(prices)} services, {stats['orders']} orders, {stats['lines']} order lines "
+            f"and {stats['reviews']} reviews."
+        ))
+
+    def batches(self, count):
+        for start in range(0, count, self.batch_size):
+            yield range(start, min(start + self.batch_size, count))
+
+    def create_users(self, count, password):
+        User = get_user_model()
+        # One hash for everyone, hashing each password would dominate the run.
+        password = make_password(password)
+        offset = next_number(User)
+        user_ids = []
+        for batch in self.batches(count):
+            with transaction.atomic():
+                users = User.objects.bulk_create(
+                    User(
+                        username=f'user{offset + number}',
+                        email=f'user{offset + number}@example.com',
+                        first_name=self.random.choice(FIRST_NAMES),
+                        last_name=self.random.choice(LAST_NAMES),
+                        password=password,
+                    ) for number in batch
+                )
+                if users and users[0].pk is None:
+                    users = User.objects.filter(username__in=[user.username for user in users])
+                Profile.objects.bulk_create(Profile(user=user) for user in users)
+            user_ids += [user.pk for user in users]
+        self.created(Profile, len(user_ids))
+        return user_ids
+
+    def create_car_models(self, count):
+        makes = list(MAKES.items())
+        car_models = CarModel.objects.bulk_create(
+            CarModel(
+                year=self.random.randint(self.today.year - 25, self.today.year),
+                make=makes[number % len(makes)][0],
+                model=self.random.choice(makes[number % len(makes)][1]),
+                engine=self.random.choice(ENGINES),
+            ) for number in range(count)
+        )
+        self.created(CarModel, len(car_models))
+        return [car_model.pk for car_model in car_models]
+
+    def create_cars(self, count, car_model_ids):
+        offset = next_number(Car)
+        car_ids = []
+        for batch in self.batches(count):
+            cars = Car.objects.bulk_create(
+                Car(
+                    car_model_id=self.random.choice(car_model_ids),
+                    plate_number=''.join(self.random.choices(PLATE_LETTERS, k=3)) + f'{number % 1000:03d}',
+                    VIN_code=f'GEN{offset + number:014d}',
+                    owner=f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}',
+                ) for number in batch
+            )
+            car_ids += [car.pk for car in cars]
+        self.created(Car, len(car_ids))
+        return car_ids
+
+    def create_services(self, count):
+        services = Service.objects.bulk_create(
+            Service(
+                name=SERVICES[number] if number < len(SERVICES) else f'Service {number + 1}',
+                price=Decimal(self.random.randint(1000, 50000)) / 100,
+            ) for number in range(count)
+        )
+        self.created(Service, len(services))
+        return {service.pk: service.price for service in services}
+
+    def create_orders(self, count, car_ids, user_ids, prices, options):
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        service_ids = list(prices)
+        reviewer_ids = user_ids or list(get_user_model().objects.values_list('pk', flat=True)[:100])
+        stats = {'orders': 0, 'lines': 0, 'reviews': 0}
+        for batch in self.batches(count):
+            orders, order_lines, days = [], [], {}
+            for number in batch:
+                day = self.today - timedelta(days=self.random.randrange(max(options['days'], 1)))
+                status = self.random.choices(statuses, weights)[0]
+                lines = [
+                    OrderLine(service_id=service_id, quantity=self.random.randint(1, 4), price=prices[service_id])
+                    for service_id in self.random.sample(
+                        service_ids, min(self.random.randint(1, options['lines_per_order']), len(service_ids))
+                    )
+                ] if service_ids else []
+                orders.append(Order(
+                    car_id=self.random.choice(car_ids),
+                    reader_id=self.random.choice(user_ids) if user_ids and self.random.random() < 0.8 else None,
+                    status=status,
+                    estimate_date=day + timedelta(days=self.random.randint(1, 30)) if status in Order.OPEN_STATUSES
+                    else None,
+                    total_sum=sum((line.quantity * line.price for line in lines), Decimal(0)),
+                ))
+                order_lines.append(lines)
+                days.setdefault(day, []).append(len(orders) - 1)
+            with transaction.atomic():
+                orders = Order.objects.bulk_create(orders)
+                # Order.date is auto_now_add, bulk_create stamps today on every order.
+                for day, positions in days.items():
+                    Order.objects.filter(pk__in=[orders[position].pk for position in positions]).update(date=day)
+                for order, lines in zip(orders, order_lines):
+                    for line in lines:
+                        line.order_id = order.pk
+                OrderLine.objects.bulk_create(
+                    [line for lines in order_lines for line in lines], update_totals=False
+                )
+                reviews = OrderReview.objects.bulk_create(
+                    OrderReview(
+                        order=order, owner_id=self.random.choice(reviewer_ids), content=self.random.choice(REVIEWS),
+                    ) for order in orders if reviewer_ids and self.random.random() < options['reviews']
+                )
+                schedule_refresh(days)
+            stats['orders'] += len(orders)
+            stats['lines'] += sum(len(lines) for lines in order_lines)
+            stats['reviews'] += len(reviews)
+        self.created(Order, stats['orders'])
+        self.created(OrderReview, stats['reviews'])
+        return stats
+
+    def created(self, model, count):
+        """Bulk inserts skip the signals that keep cached counts and content current."""
+        if not count:
+            return
+        if model in COUNTED_MODELS.values():
+            change_count(model, count)
+        invalidate_dependents(model)
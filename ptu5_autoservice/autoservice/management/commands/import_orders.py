@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from autoservice.importer import FORMATS, ImportRowError, OrderImporter, format_from_name, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports cars, orders and order lines from a CSV or JSON Lines file, see autoservice/importer.py.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        importer = OrderImporter(batch_size=options['batch_size'])
+        started = time.perf_counter()
+        with open(options['path'], encoding='utf-8', newline='') as stream:
+            try:
+                stats = importer.run(read_rows(stream, options['format'] or format_from_name(options['path'])))
+            except (ImportRowError, ValueError) as error:
+                raise CommandError(f'{error} ({dict(importer.stats)} imported before the error)')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats.get('orders', 0)} orders with {stats.get('order_lines', 0)} lines "
+            f"and {stats.get('cars', 0)} new cars in {elapsed:.1f} s "
+            f"({stats.get('rows', 0) / elapsed * 60:,.0f} rows/min)."
+        ))
@@ -0,0 +1,119 @@
+import asyncio
+import statistics
+import threading
+import time
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    help = 'Replays GET requests from concurrent clients through the WSGI or ASGI handler and reports throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['/', '/cars/', '/orders/'])
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent clients.')
+        parser.add_argument('--requests', type=int, default=250, help='Requests per client.')
+        parser.add_argument('--asgi', action='store_true', help='Use the ASGI handler with one task per client.')
+        parser.add_argument('--new-visitors', action='store_true', help='Drop the cookies after every request.')
+
+    def handle(self, *args, **options):
+        self.paths = options['paths']
+        self.requests = options['requests']
+        self.new_visitors = options['new_visitors']
+        self.latencies = []
+        self.errors = []
+        self.queries = []
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(count_connection)
+        started = time.perf_counter()
+        # The test clients send Host: testserver.
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            if options['asgi']:
+                asyncio.run(self.run_asgi(options['threads']))
+            else:
+                self.run_wsgi(options['threads'])
+        elapsed = time.perf_counter() - started
+        connection_created.disconnect(count_connection)
+
+        database = connections['default'].settings_dict
+        self.stdout.write(
+            f"{'ASGI' if options['asgi'] else 'WSGI'}, {database['ENGINE'].rsplit('.', 1)[-1]}, "
+            f"CONN_MAX_AGE={database['CONN_MAX_AGE']}: "
+            f'{len(self.latencies)} requests in {elapsed:.2f}s, {len(self.latencies) / elapsed:,.0f} req/s'
+        )
+        if len(self.latencies) > 1:
+            cuts = statistics.quantiles(self.latencies, n=20)
+            self.stdout.write(f'latency p50 {cuts[9] * 1000:.1f} ms, p95 {cuts[18] * 1000:.1f} ms')
+        writes = sum(1 for sql in self.queries if sql.lstrip()[:6].upper() in WRITE_STATEMENTS)
+        self.stdout.write(
+            f'queries per request {len(self.queries) / max(len(self.latencies), 1):.2f}, '
+            f'writes {writes} ({writes / max(len(self.latencies), 1):.2f} per request)'
+        )
+        self.stdout.write(f'connections opened: {len(opened)}, errors: {len(self.errors)}')
+        for error in self.errors[:10]:
+            self.stderr.write(error)
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def record(self, path, response, started):
+        self.latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors.append(f'{path}: {response.status_code}')
+
+    def run_wsgi(self, clients):
+        def worker(number):
+            client = Client()
+            try:
+                # Each thread has its own connection, wrappers stay on it across reconnects.
+                connections['default'].execute_wrappers.append(self.count_query)
+                for request in range(self.requests):
+                    path = self.paths[(number + request) % len(self.paths)]
+                    started = time.perf_counter()
+                    if self.new_visitors:
+                        client.cookies.clear()
+                    response = client.get(path)
+                    # The test client skips this request_finished handler, a real server runs it.
+                    close_old_connections()
+                    self.record(path, response, started)
+            except Exception as error:
+                self.errors.append(f'{type(error).__name__}: {error}')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(number, )) for number in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    async def run_asgi(self, clients):
+        async def worker(number):
+            client = AsyncClient()
+            try:
+                for request in range(self.requests):
+                    path = self.paths[(number + request) % len(self.paths)]
+                    started = time.perf_counter()
+                    if self.new_visitors:
+                        client.cookies.clear()
+                    response = await client.get(path)
+                    await sync_to_async(close_old_connections)()
+                    self.record(path, response, started)
+            except Exception as error:
+                self.errors.append(f'{type(error).__name__}: {error}')
+
+        # The async ORM runs every query on one thread, the wrapper goes on its connection.
+        await sync_to_async(connections['default'].execute_wrappers.append)(self.count_query)
+        await asyncio.gather(*(worker(number) for number in range(clients)))
+        await sync_to_async(connections.close_all)()
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from autoservice.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Flags overdue orders and emails their readers, once per order, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many orders would be flagged.')
+
+    def handle(self, *args, **options):
+        # Orders that were rescheduled or closed get notified again if they fall behind later.
+        cleared = Order.objects.filter(overdue_notified_at__isnull=False).exclude(
+            Order.objects.overdue_condition()
+        )
+        pending = Order.objects.overdue().filter(overdue_notified_at__isnull=True)
+        if options['dry_run']:
+            self.stdout.write(f'{pending.count()} overdue orders to flag, {cleared.count()} flags to clear.')
+            return
+        cleared = cleared.update(overdue_notified_at=None)
+        batch_size = options['batch_size']
+        last_pk = 0
+        flagged = sent = 0
+        while True:
+            batch = list(
+                pending.filter(pk__gt=last_pk).select_related('car', 'reader').order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            messages = [
+                (
+                    _('Your order is overdue'),
+                    _('Order %(order)s for %(plate)s was due on %(date)s and is not finished yet.') % {
+                        'order': order.pk, 'plate': order.car.plate_number, 'date': order.estimate_date,
+                    },
+                    settings.EMAIL_HOST_USER,
+                    [order.reader.email],
+                ) for order in batch if order.reader and order.reader.email
+            ]
+            sent += send_mass_mail(messages, fail_silently=False)
+            flagged += Order.objects.filter(pk__in=[order.pk for order in batch]).update(
+                overdue_notified_at=timezone.now()
+            )
+        self.stdout.write(self.style.SUCCESS(f'Flagged {flagged} overdue orders, sent {sent} emails, cleared {cleared} flags.'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from autoservice.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Recalculates Order.total_sum for orders whose total drifted from their order lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted orders.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        checked = fixed = 0
+        while True:
+            batch = list(
+                Order.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            checked += len(batch)
+            drifted = list(Order.objects.filter(pk__in=batch).drifted().values_list('pk', flat=True))
+            if drifted and not options['dry_run']:
+                Order.objects.filter(pk__in=drifted).update_totals()
+            fixed += len(drifted)
+        action = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} orders. {action} {fixed} drifted totals.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from autoservice.export import parse_day
+from autoservice.reports import refresh_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily order and service rollups used by the reports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=parse_day, help='YYYY-MM-DD')
+        parser.add_argument('--to', dest='date_to', type=parse_day, help='YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        days = refresh_all(options['date_from'], options['date_to'])
+        self.stdout.write(f'Refreshed {days} days.')
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import logging
+import random
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from . import performance, routers, templating
+
+logger = logging.getLogger(__name__)
+
+
+class RequestScopeMiddleware:
+    """Runs natively under WSGI and ASGI, subclasses set up per request state in begin(),
+    tear it down in end() and adjust the response in process_response()."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Lets the handler call this middleware without a sync adapter under ASGI.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.acall(request)
+        state = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.end(state)
+        return self.process_response(request, state, response)
+
+    async def acall(self, request):
+        state = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.end(state)
+        return self.process_response(request, state, response)
+
+    def begin(self, request):
+        return None
+
+    def end(self, state):
+        pass
+
+    def process_response(self, request, state, response):
+        return response
+
+
+class PerformanceMiddleware(RequestScopeMiddleware):
+    """Times PERF_SAMPLE_RATE of all requests, adds a Server-Timing header and logs them as JSON."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_SAMPLE_RATE', 0):
+            raise MiddlewareNotUsed
+        performance.install()
+        super().__init__(get_response)
+
+    def begin(self, request):
+        if random.random() < settings.PERF_SAMPLE_RATE:
+            return performance.begin_request()
+
+    def end(self, state):
+        if state is not None:
+            performance.end_request(state)
+
+    def process_response(self, request, state, response):
+        if state is None:
+            return response
+        record = performance.finish(state, request, response)
+        response['Server-Timing'] = performance.server_timing(record)
+        logger.info(json.dumps(record), extra={'performance': record})
+        return response
+
+
+class ReplicaPinningMiddleware(RequestScopeMiddleware):
+    def begin(self, request):
+        return routers.begin_request(request)
+
+    def end(self, state):
+        routers.end_request(state[1])
+
+    def process_response(self, request, state, response):
+        if state[0].wrote and getattr(settings, 'REPLICA_DATABASES', ()):
+            response.set_cookie(
+                routers.PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class TemplateProfilerMiddleware(RequestScopeMiddleware):
+    """Logs the slowest templates and tags of every request that renders one."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TEMPLATE_PROFILER', False):
+            raise MiddlewareNotUsed
+        templating.install()
+        super().__init__(get_response)
+
+    def begin(self, request):
+        profile, token = templating.begin_profile()
+        request.template_profile = profile
+        return profile, token
+
+    def end(self, state):
+        templating.end_profile(state[1])
+
+    def process_response(self, request, state, response):
+        profile = state[0]
+        if profile.templates:
+            logger.info(
+                '%s %s %s', request.method, request.path, profile.summary(settings.TEMPLATE_PROFILER_TOP),
+                extra={'template_profile': profile.as_dict(settings.TEMPLATE_PROFILER_TOP)},
+            )
+        return response
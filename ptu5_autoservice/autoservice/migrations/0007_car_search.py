@@ -0,0 +1,71 @@
+from django.db import migrations
+
+SEARCH_COLUMNS = 'owner, plate_number, vin_code, make, model'
+SELECT_CARS = '''
+    SELECT car.id, car.owner, car.plate_number, car."VIN_code", car_model.make, car_model.model
+    FROM autoservice_car car
+    JOIN autoservice_carmodel car_model ON car_model.id = car.car_model_id
+'''
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE autoservice_car_search USING fts5({SEARCH_COLUMNS}, tokenize='trigram')",
+    f'INSERT INTO autoservice_car_search(rowid, {SEARCH_COLUMNS}) {SELECT_CARS}',
+    f'''CREATE TRIGGER autoservice_car_search_insert AFTER INSERT ON autoservice_car BEGIN
+        INSERT INTO autoservice_car_search(rowid, {SEARCH_COLUMNS}) {SELECT_CARS} WHERE car.id = new.id;
+    END''',
+    f'''CREATE TRIGGER autoservice_car_search_update AFTER UPDATE ON autoservice_car BEGIN
+        DELETE FROM autoservice_car_search WHERE rowid = old.id;
+        INSERT INTO autoservice_car_search(rowid, {SEARCH_COLUMNS}) {SELECT_CARS} WHERE car.id = new.id;
+    END''',
+    '''CREATE TRIGGER autoservice_car_search_delete AFTER DELETE ON autoservice_car BEGIN
+        DELETE FROM autoservice_car_search WHERE rowid = old.id;
+    END''',
+    f'''CREATE TRIGGER autoservice_car_search_model_update AFTER UPDATE OF make, model ON autoservice_carmodel BEGIN
+        DELETE FROM autoservice_car_search WHERE rowid IN (SELECT id FROM autoservice_car WHERE car_model_id = new.id);
+        INSERT INTO autoservice_car_search(rowid, {SEARCH_COLUMNS}) {SELECT_CARS} WHERE car.car_model_id = new.id;
+    END''',
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS autoservice_car_search_insert',
+    'DROP TRIGGER IF EXISTS autoservice_car_search_update',
+    'DROP TRIGGER IF EXISTS autoservice_car_search_delete',
+    'DROP TRIGGER IF EXISTS autoservice_car_search_model_update',
+    'DROP TABLE IF EXISTS autoservice_car_search',
+]
+
+TRIGRAM_INDEXES = (
+    ('autoservice_car_owner_trgm', 'autoservice_car', 'owner'),
+    ('autoservice_car_plate_number_trgm', 'autoservice_car', 'plate_number'),
+    ('autoservice_car_vin_code_trgm', 'autoservice_car', '"VIN_code"'),
+    ('autoservice_carmodel_make_trgm', 'autoservice_carmodel', 'make'),
+    ('autoservice_carmodel_model_trgm', 'autoservice_carmodel', 'model'),
+)
+
+POSTGRESQL_FORWARD = ['CREATE EXTENSION IF NOT EXISTS pg_trgm'] + [
+    f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+    for name, table, column in TRIGRAM_INDEXES
+]
+
+POSTGRESQL_BACKWARD = [f'DROP INDEX IF EXISTS {name}' for name, table, column in TRIGRAM_INDEXES]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoservice', '0006_orderreview'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run_statements({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
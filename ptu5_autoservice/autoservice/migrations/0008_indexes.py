@@ -0,0 +1,95 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:25
+
+from django.db import migrations, models
+
+# The search triggers from 0007, SQLite drops them whenever a migration rebuilds
+# autoservice_car. Later migrations that rebuild it have to do the same.
+SEARCH_COLUMNS = 'owner, plate_number, vin_code, make, model'
+SELECT_CARS = '''
+    SELECT car.id, car.owner, car.plate_number, car."VIN_code", car_model.make, car_model.model
+    FROM autoservice_car car
+    JOIN autoservice_carmodel car_model ON car_model.id = car.car_model_id
+'''
+
+SQLITE_TRIGGERS = [
+    f'''CREATE TRIGGER autoservice_car_search_insert AFTER INSERT ON autoservice_car BEGIN
+        INSERT INTO autoservice_car_search(rowid, {SEARCH_COLUMNS}) {SELECT_CARS} WHERE car.id = new.id;
+    END''',
+    f'''CREATE TRIGGER autoservice_car_search_update AFTER UPDATE ON autoservice_car BEGIN
+        DELETE FROM autoservice_car_search WHERE rowid = old.id;
+        INSERT INTO autoservice_car_search(rowid, {SEARCH_COLUMNS}) {SELECT_CARS} WHERE car.id = new.id;
+    END''',
+    '''CREATE TRIGGER autoservice_car_search_delete AFTER DELETE ON autoservice_car BEGIN
+        DELETE FROM autoservice_car_search WHERE rowid = old.id;
+    END''',
+    f'''CREATE TRIGGER autoservice_car_search_model_update AFTER UPDATE OF make, model ON autoservice_carmodel BEGIN
+        DELETE FROM autoservice_car_search WHERE rowid IN (SELECT id FROM autoservice_car WHERE car_model_id = new.id);
+        INSERT INTO autoservice_car_search(rowid, {SEARCH_COLUMNS}) {SELECT_CARS} WHERE car.car_model_id = new.id;
+    END''',
+]
+
+SQLITE_DROP_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS autoservice_car_search_insert',
+    'DROP TRIGGER IF EXISTS autoservice_car_search_update',
+    'DROP TRIGGER IF EXISTS autoservice_car_search_delete',
+    'DROP TRIGGER IF EXISTS autoservice_car_search_model_update',
+]
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_DROP_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoservice', '0007_car_search'),
+    ]
+
+    operations = [
+        # Rebuilding autoservice_car on SQLite would drop the search triggers.
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        migrations.AlterField(
+            model_name='car',
+            name='VIN_code',
+            field=models.CharField(help_text='Vehicle identification number', max_length=17, unique=True, verbose_name='VIN'),
+        ),
+        migrations.AlterField(
+            model_name='car',
+            name='plate_number',
+            field=models.CharField(db_index=True, max_length=50, verbose_name='plate number'),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['date', 'id'], name='order_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['reader', 'date'], name='order_reader_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'estimate_date'], name='order_status_estimate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['estimate_date'], name='order_estimate_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderreview',
+            index=models.Index(fields=['owner', 'created_at'], name='review_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderreview',
+            index=models.Index(fields=['order', 'created_at'], name='review_order_created_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoservice', '0008_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOrderStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='day')),
+                ('orders_count', models.IntegerField(default=0, verbose_name='orders')),
+                ('open_count', models.IntegerField(default=0, verbose_name='open orders')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='revenue')),
+            ],
+            options={
+                'verbose_name': 'Daily order statistics',
+                'verbose_name_plural': 'Daily order statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyServiceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='day')),
+                ('quantity', models.IntegerField(default=0, verbose_name='quantity')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='revenue')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='autoservice.service', verbose_name='service')),
+            ],
+            options={
+                'verbose_name': 'Daily service statistics',
+                'verbose_name_plural': 'Daily service statistics',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyservicestats',
+            constraint=models.UniqueConstraint(fields=('day', 'service'), name='daily_service_stats_day_service'),
+        ),
+    ]
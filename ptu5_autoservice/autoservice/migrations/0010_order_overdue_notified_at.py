@@ -0,0 +1,18 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoservice', '0009_reports'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='overdue_notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='overdue notice sent'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+class CachedObjectMixin:
+    """Fetches the object of a single object view once per request.
+
+    Generic views call get_object() from several hooks (test_func, get_initial,
+    form_valid, get_success_url ...), each of which would query it again.
+    """
+    object_select_related = ('car__car_model', 'reader')
+
+    def get_queryset(self):
+        return super().get_queryset().select_related(*self.object_select_related)
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
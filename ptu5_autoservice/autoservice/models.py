@@ -1,9 +1,16 @@
 from django.db import models
+from django.db.models import BooleanField, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
 from django.utils.translation import gettext_lazy as _
 from datetime import date
 from django.contrib.auth import get_user_model
-from django.utils.timezone import datetime
+from django.utils import timezone
 from tinymce.models import HTMLField
+from . thumbnails import schedule as schedule_thumbnails
+
+# Sent with the updated queryset whenever order totals are recalculated in bulk.
+totals_updated = Signal()
 
 class CarModel(models.Model):
     YEARS_CHOICES = ((years, str(years)) for years in reversed(range(1900, date.today().year+1)))
@@ -29,8 +36,8 @@ class Car(models.Model):
         on_delete=models.CASCADE, 
         related_name='cars'
     )
-    plate_number = models.CharField(_("plate number"), max_length=50)
-    VIN_code = models.CharField(_("VIN"), max_length=17, help_text='Vehicle identification number')
+    plate_number = models.CharField(_("plate number"), max_length=50, db_index=True)
+    VIN_code = models.CharField(_("VIN"), max_length=17, unique=True, help_text='Vehicle identification number')
     owner = models.CharField(_("owner name"), max_length=100)
     cover = models.ImageField(_("cover"), upload_to='covers', blank=True, null=True)
     description = HTMLField(_("description"), max_length=1000, default='---')
@@ -42,6 +49,10 @@ class Car(models.Model):
     def __str__(self) -> str:
         return f'{self.car_model.make}, {self.car_model.model}, {self.plate_number}, {self.owner}'
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        schedule_thumbnails(self.cover)
+
 
 class Service(models.Model):
     name = models.CharField(_("service name"), max_length=50)
@@ -55,6 +66,39 @@ class Service(models.Model):
         return f'{self.name}- {self.price}'
 
 
+def line_total_expression():
+    return Sum(F('quantity') * F('price'), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def line_total_subquery():
+    lines = OrderLine.objects.filter(order=OuterRef('pk')).values('order').annotate(
+        total=line_total_expression()
+    ).values('total')
+    return Coalesce(Subquery(lines), Value(0), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_line_total(self):
+        return self.annotate(line_total=line_total_subquery())
+
+    def update_totals(self):
+        rows = self.update(total_sum=line_total_subquery())
+        totals_updated.send(sender=Order, queryset=self)
+        return rows
+
+    def drifted(self):
+        return self.with_line_total().exclude(total_sum=F('line_total'))
+
+    def overdue_condition(self):
+        return Q(status__in=self.model.OPEN_STATUSES, estimate_date__lt=timezone.localdate())
+
+    def with_overdue(self):
+        return self.annotate(overdue=ExpressionWrapper(self.overdue_condition(), output_field=BooleanField()))
+
+    def overdue(self):
+        return self.filter(self.overdue_condition())
+
+
 class Order(models.Model):
     STATUS_CHOICES = (
         ('n', _('new')),
@@ -65,6 +109,7 @@ class Order(models.Model):
         ('c', _('cancelled')),
         ('p', _('paid')),
     )
+    OPEN_STATUSES = ('n', 'a', 'o', 'w')
     car = models.ForeignKey(
         Car, 
         verbose_name=_("car"), 
@@ -82,30 +127,59 @@ class Order(models.Model):
         null=True, blank=True,
     )
 
+    overdue_notified_at = models.DateTimeField(_("overdue notice sent"), null=True, blank=True, editable=False)
+
     @property
     def is_overdue(self):
-        if self.estimate_date and self.estimate_date < datetime.date(datetime.now()):
-            return True
-        return False
+        if hasattr(self, 'overdue'):
+            return self.overdue
+        return bool(
+            self.status in self.OPEN_STATUSES and self.estimate_date and self.estimate_date < timezone.localdate()
+        )
+
+    objects = OrderQuerySet.as_manager()
 
     class Meta:
         verbose_name = _('Order')
         verbose_name_plural = _('Orders')
+        indexes = [
+            models.Index(fields=['date', 'id'], name='order_date_id_idx'),
+            models.Index(fields=['reader', 'date'], name='order_reader_date_idx'),
+            models.Index(fields=['status', 'estimate_date'], name='order_status_estimate_idx'),
+            models.Index(fields=['estimate_date'], name='order_estimate_date_idx'),
+        ]
 
     def get_total(self):
-        total = 0
-        for line in self.order_lines.all():
-            total += line.total_sum
-        return total
+        return self.order_lines.aggregate(total=line_total_expression())['total'] or 0
 
-    def save(self, *args, **kwargs):
-        if not self._state.adding:
-            self.total_sum = self.get_total()
-        super().save(*args, **kwargs)
+    def update_total(self):
+        Order.objects.filter(pk=self.pk).update_totals()
+        self.refresh_from_db(fields=['total_sum'])
 
     def __str__(self) -> str:
         return f"{self.date}: {self.total_sum}, {self.car.plate_number} {self.car.owner}"
 
+class OrderLineQuerySet(models.QuerySet):
+    TOTAL_FIELDS = {'order', 'order_id', 'quantity', 'price'}
+
+    def bulk_create(self, objs, *args, update_totals=True, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if update_totals:
+            Order.objects.filter(pk__in={obj.order_id for obj in objs}).update_totals()
+        return objs
+
+    def update(self, **kwargs):
+        if not self.TOTAL_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        order_ids = set(self.values_list('order_id', flat=True).distinct())
+        rows = super().update(**kwargs)
+        new_order = kwargs.get('order', kwargs.get('order_id'))
+        if new_order is not None:
+            order_ids.add(getattr(new_order, 'pk', new_order))
+        Order.objects.filter(pk__in=order_ids).update_totals()
+        return rows
+
+
 class OrderLine(models.Model):
     order = models.ForeignKey(
         Order, 
@@ -122,10 +196,18 @@ class OrderLine(models.Model):
     quantity = models.IntegerField(_("quantity"), default=1)
     price = models.DecimalField(_("price"), max_digits=10, decimal_places=2)
 
+    objects = OrderLineQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Order line')
         verbose_name_plural = _('Order lines')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_order_id = instance.__dict__.get('order_id')
+        return instance
+
     @property
     def total_sum(self):
         return self.quantity * self.price
@@ -153,4 +235,43 @@ class OrderReview(models.Model):
         return f"{self.owner} on {self.order} at {self.created_at}"
 
     class Meta:
-        ordering = ('-created_at', )
\ No newline at end of file
+        ordering = ('-created_at', )
+        indexes = [
+            models.Index(fields=['owner', 'created_at'], name='review_owner_created_idx'),
+            models.Index(fields=['order', 'created_at'], name='review_order_created_idx'),
+        ]
+
+class DailyOrderStats(models.Model):
+    day = models.DateField(_("day"), unique=True)
+    orders_count = models.IntegerField(_("orders"), default=0)
+    open_count = models.IntegerField(_("open orders"), default=0)
+    revenue = models.DecimalField(_("revenue"), max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _('Daily order statistics')
+        verbose_name_plural = _('Daily order statistics')
+
+    def __str__(self) -> str:
+        return f'{self.day}: {self.orders_count}, {self.revenue}'
+
+
+class DailyServiceStats(models.Model):
+    day = models.DateField(_("day"))
+    service = models.ForeignKey(
+        Service,
+        verbose_name=_("service"),
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    quantity = models.IntegerField(_("quantity"), default=0)
+    revenue = models.DecimalField(_("revenue"), max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _('Daily service statistics')
+        verbose_name_plural = _('Daily service statistics')
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'service'], name='daily_service_stats_day_service'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.day}: {self.service_id}, {self.revenue}'
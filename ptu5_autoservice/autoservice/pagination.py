@@ -0,0 +1,167 @@
+from hashlib import md5
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'autoservice.pagination.cursor'
+
+
+def cached_count(queryset, timeout=None):
+    """Returns queryset.count(), shared through the cache for a short while.
+
+    Listing pages show the total on every request, so an approximate number
+    that is at most PAGINATION_COUNT_TIMEOUT seconds old is good enough.
+    """
+    return cache.get_or_set(count_key(queryset), queryset.count, count_timeout(timeout))
+
+
+async def acached_count(queryset, timeout=None):
+    key = count_key(queryset)
+    count = await cache.aget(key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count, count_timeout(timeout))
+    return count
+
+
+def count_key(queryset):
+    return 'count:' + md5(f'{queryset.db}:{queryset.query}'.encode()).hexdigest()
+
+
+def count_timeout(timeout):
+    return getattr(settings, 'PAGINATION_COUNT_TIMEOUT', 60) if timeout is None else timeout
+
+
+class CachedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset pagination over ascending ordering fields, the last one unique.
+
+    Pages are addressed by signed, opaque cursors holding the ordering values of
+    the first or last row, so every page costs one indexed range query no matter
+    how deep it is.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('date', 'id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    @cached_property
+    def count(self):
+        return cached_count(self.queryset)
+
+    def encode_cursor(self, obj, backwards=False):
+        values = [str(getattr(obj, field)) for field in self.ordering]
+        return signing.dumps({'v': values, 'b': backwards}, salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            values, backwards = data['v'], data['b']
+        except (signing.BadSignature, KeyError, TypeError):
+            return None, False
+        if len(values) != len(self.ordering):
+            return None, False
+        return values, backwards
+
+    def keyset_filter(self, values, backwards):
+        lookup = 'lt' if backwards else 'gt'
+        condition = Q()
+        for position in reversed(range(len(self.ordering))):
+            field = self.ordering[position]
+            equal = Q(**dict(zip(self.ordering[:position], values)))
+            condition = (equal & Q(**{f'{field}__{lookup}': values[position]})) | condition
+        return condition
+
+    def page(self, cursor=None):
+        queryset, values, backwards = self.page_queryset(cursor)
+        return self.build_page(list(queryset), values, backwards)
+
+    async def apage(self, cursor=None):
+        queryset, values, backwards = self.page_queryset(cursor)
+        return self.build_page([row async for row in queryset], values, backwards)
+
+    def page_queryset(self, cursor):
+        values, backwards = self.decode_cursor(cursor) if cursor else (None, False)
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values, backwards))
+        if backwards:
+            queryset = queryset.order_by(*(f'-{field}' for field in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        return queryset[:self.per_page + 1], values, backwards
+
+    def build_page(self, rows, values, backwards):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows, self)
+        more_after = (not backwards and has_more) or (backwards and values is not None)
+        more_before = (backwards and has_more) or (not backwards and values is not None)
+        return CursorPage(
+            rows, self,
+            next_cursor=self.encode_cursor(rows[-1]) if more_after else None,
+            previous_cursor=self.encode_cursor(rows[0], backwards=True) if more_before else None,
+        )
+
+
+async def apaginate(queryset, per_page, number):
+    """Paginator.get_page() for async views, counting and fetching through the async ORM."""
+    paginator = CachedCountPaginator(queryset, per_page)
+    paginator.count = await acached_count(queryset)
+    page = paginator.get_page(number)
+    page.object_list = [obj async for obj in page.object_list]
+    return page
+
+
+def cursor_pagination_enabled():
+    return getattr(settings, 'AUTOSERVICE_CURSOR_PAGINATION', False)
+
+
+class CursorPaginationMixin:
+    """Lets a ListView switch to CursorPaginator with AUTOSERVICE_CURSOR_PAGINATION."""
+    cursor_ordering = ('date', 'id')
+    paginator_class = CachedCountPaginator
+
+    def paginate_queryset(self, queryset, page_size):
+        if not cursor_pagination_enabled():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, self.cursor_ordering)
+        page = paginator.page(self.request.GET.get('cursor'))
+        return (paginator, page, page.object_list, page.has_other_pages())
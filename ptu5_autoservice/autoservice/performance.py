@@ -0,0 +1,133 @@
+"""Per-request SQL, cache and template timings for PerformanceMiddleware.
+
+Sampled requests are summed into latency histograms per URL name, get_metrics()
+returns them for the perf/metrics/ endpoint.
+"""
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from django.db import connections
+from . import cache_backends, templating
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current = ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+histograms = {}
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache, self.cache_token = cache_backends.begin_request()
+        self.templates, self.template_token = templating.begin_profile(tags=False)
+        self.token = _current.set(self)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_time += time.perf_counter() - started
+
+
+def time_queries(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install():
+    """Times queries on this thread's connections, signals.py covers the ones opened later."""
+    templating.install()
+    for connection in connections.all():
+        time_queries(connection)
+
+
+def begin_request():
+    return RequestMetrics()
+
+
+def end_request(metrics):
+    metrics.elapsed = time.perf_counter() - metrics.started
+    _current.reset(metrics.token)
+    cache_backends.end_request(metrics.cache_token)
+    templating.end_profile(metrics.template_token)
+
+
+def finish(metrics, request, response):
+    """Adds a finished request to its URL name's histogram and returns its log record."""
+    match = getattr(request, 'resolver_match', None)
+    record = {
+        'view': match.view_name if match else None,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'ms': round(metrics.elapsed * 1000, 2),
+        'db_queries': metrics.queries,
+        'db_ms': round(metrics.query_time * 1000, 2),
+        'cache_hits': metrics.cache['hits'],
+        'cache_misses': metrics.cache['misses'],
+        'template_ms': round(metrics.templates.total * 1000, 2),
+    }
+    bucket = next((limit for limit in BUCKETS_MS if record['ms'] <= limit), 'inf')
+    with _lock:
+        histogram = histograms.setdefault(record['view'] or '<unresolved>', Counter())
+        histogram['count'] += 1
+        histogram[f'le_{bucket}'] += 1
+        for key in ('ms', 'db_queries', 'db_ms', 'cache_hits', 'cache_misses', 'template_ms'):
+            histogram[key] += record[key]
+    return record
+
+
+def server_timing(record):
+    return (
+        f"total;dur={record['ms']}, "
+        f"db;dur={record['db_ms']};desc=\"{record['db_queries']} queries\", "
+        f"cache;desc=\"{record['cache_hits']} hits {record['cache_misses']} misses\", "
+        f"tpl;dur={record['template_ms']}"
+    )
+
+
+def quantile(histogram, fraction):
+    """Upper bound of the bucket that holds the given fraction of requests."""
+    seen = 0
+    for limit in BUCKETS_MS + ('inf', ):
+        seen += histogram[f'le_{limit}']
+        if seen >= fraction * histogram['count']:
+            return limit
+    return 'inf'
+
+
+def get_metrics():
+    with _lock:
+        snapshot = {name: Counter(histogram) for name, histogram in histograms.items()}
+    metrics = {}
+    for name, histogram in sorted(snapshot.items()):
+        count = histogram['count']
+        metrics[name] = {
+            'count': count,
+            'p50_ms': quantile(histogram, 0.5),
+            'p95_ms': quantile(histogram, 0.95),
+            'buckets': {str(limit): histogram[f'le_{limit}'] for limit in BUCKETS_MS + ('inf', )},
+            'avg_ms': round(histogram['ms'] / count, 2),
+            'avg_db_queries': round(histogram['db_queries'] / count, 2),
+            'avg_db_ms': round(histogram['db_ms'] / count, 2),
+            'avg_template_ms': round(histogram['template_ms'] / count, 2),
+            'cache_hits': histogram['cache_hits'],
+            'cache_misses': histogram['cache_misses'],
+        }
+    return metrics
+
+
+def reset_metrics():
+    with _lock:
+        histograms.clear()
@@ -0,0 +1,78 @@
+"""Cache-based sliding window rate limits for user actions.
+
+RATE_LIMITS in settings maps an action name to (allowed hits, window seconds).
+The hit timestamps of each client live in the cache, so checking a limit does
+not touch the database.
+"""
+import time
+from functools import wraps
+from math import ceil
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.shortcuts import render
+
+
+def client_id(request):
+    # The session already names the logged in user, loading the user is not needed.
+    user_id = request.session.get(SESSION_KEY)
+    if user_id:
+        return f'user:{user_id}'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _key(action, ident):
+    return f'ratelimit:{action}:{ident}'
+
+
+def _recent_hits(action, ident, now):
+    limit, window = settings.RATE_LIMITS[action]
+    return [hit for hit in cache.get(_key(action, ident), []) if hit > now - window]
+
+
+def retry_after(action, ident):
+    """Returns seconds until the next hit is allowed, 0 when it is allowed now."""
+    limit, window = settings.RATE_LIMITS[action]
+    now = time.time()
+    hits = _recent_hits(action, ident, now)
+    if len(hits) < limit:
+        return 0
+    return hits[-limit] + window - now
+
+
+def record(action, ident):
+    limit, window = settings.RATE_LIMITS[action]
+    now = time.time()
+    hits = _recent_hits(action, ident, now)[-limit:]
+    cache.set(_key(action, ident), hits + [now], window)
+
+
+def too_many_requests(request, seconds):
+    response = render(request, 'autoservice/too_many_requests.html', {'retry_after': ceil(seconds)}, status=429)
+    response['Retry-After'] = str(ceil(seconds))
+    return response
+
+
+def ratelimit(action, methods=('POST', )):
+    """Limits a function view, only requests with one of methods count."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                ident = client_id(request)
+                seconds = retry_after(action, ident)
+                if seconds:
+                    return too_many_requests(request, seconds)
+                record(action, ident)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMixin:
+    """Limits a class-based view to RATE_LIMITS[ratelimit_action]."""
+    ratelimit_action = None
+    ratelimit_methods = ('POST', )
+
+    def dispatch(self, request, *args, **kwargs):
+        return ratelimit(self.ratelimit_action, self.ratelimit_methods)(super().dispatch)(request, *args, **kwargs)
@@ -0,0 +1,124 @@
+"""Revenue and workload reports backed by daily rollup tables.
+
+DailyOrderStats and DailyServiceStats hold one row per order date (and service),
+so reports only ever read a few rows per day in the requested range. Whenever
+orders or their lines change, the affected days are recomputed from the base
+tables once the surrounding transaction commits.
+"""
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from . export import parse_day
+from . models import DailyOrderStats, DailyServiceStats, Order, OrderLine, line_total_expression
+
+REFRESH_CHUNK = 100
+DEFAULT_RANGE_DAYS = 30
+REVENUE = DecimalField(max_digits=14, decimal_places=2)
+
+_pending = threading.local()
+
+
+def schedule_refresh(days):
+    """Refreshes the rollups of days, a collection or a lazy queryset of dates, on commit.
+
+    Everything scheduled in one transaction is refreshed together by the first
+    callback; days left over from a rolled back transaction are simply refreshed
+    with the next one, which is harmless because rollups are recomputed from scratch.
+    """
+    _pending.__dict__.setdefault('days', []).append(days)
+    transaction.on_commit(flush_pending)
+
+
+def flush_pending():
+    days = set()
+    for scheduled in _pending.__dict__.pop('days', ()):
+        days.update(scheduled)
+    if days:
+        refresh_days(days)
+
+
+def refresh_days(days):
+    days = sorted(days)
+    for start in range(0, len(days), REFRESH_CHUNK):
+        refresh_chunk(days[start:start + REFRESH_CHUNK])
+
+
+def refresh_chunk(days):
+    revenue_filter = ~Q(status='c')
+    order_rows = Order.objects.filter(date__in=days).values('date').annotate(
+        orders_count=Count('id'),
+        open_count=Count('id', filter=Q(status__in=Order.OPEN_STATUSES)),
+        revenue=Coalesce(Sum('total_sum', filter=revenue_filter), Decimal(0), output_field=REVENUE),
+    ).order_by()
+    service_rows = OrderLine.objects.filter(order__date__in=days).exclude(order__status='c').values(
+        'order__date', 'service',
+    ).annotate(revenue=line_total_expression(), lines_quantity=Sum('quantity')).order_by()
+    with transaction.atomic():
+        DailyOrderStats.objects.filter(day__in=days).delete()
+        DailyServiceStats.objects.filter(day__in=days).delete()
+        DailyOrderStats.objects.bulk_create([
+            DailyOrderStats(
+                day=row['date'],
+                orders_count=row['orders_count'],
+                open_count=row['open_count'],
+                revenue=row['revenue'],
+            ) for row in order_rows
+        ])
+        DailyServiceStats.objects.bulk_create([
+            DailyServiceStats(
+                day=row['order__date'],
+                service_id=row['service'],
+                quantity=row['lines_quantity'],
+                revenue=row['revenue'],
+            ) for row in service_rows
+        ])
+
+
+def refresh_all(date_from=None, date_to=None):
+    """Rebuilds the rollups from scratch, optionally only between two dates."""
+    orders = Order.objects.all()
+    stale = DailyOrderStats.objects.all()
+    if date_from:
+        orders, stale = orders.filter(date__gte=date_from), stale.filter(day__gte=date_from)
+    if date_to:
+        orders, stale = orders.filter(date__lte=date_to), stale.filter(day__lte=date_to)
+    days = set(orders.dates('date', 'day')) | set(stale.values_list('day', flat=True))
+    refresh_days(days)
+    return len(days)
+
+
+def date_range(params):
+    """Reads from and to (YYYY-MM-DD) from params, defaulting to the last 30 days.
+
+    Raises ValueError when either of them is not a date or from is after to.
+    """
+    date_to = parse_day(params['to']) if params.get('to') else timezone.localdate()
+    date_from = parse_day(params['from']) if params.get('from') else date_to - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if date_from > date_to:
+        raise ValueError(f'{date_from} is after {date_to}')
+    return date_from, date_to
+
+
+def orders_per_day(date_from, date_to):
+    return list(DailyOrderStats.objects.filter(day__range=(date_from, date_to)).order_by('day').values(
+        'day', 'orders_count', 'open_count', 'revenue',
+    ))
+
+
+def revenue_per_service(date_from, date_to):
+    return list(DailyServiceStats.objects.filter(day__range=(date_from, date_to)).values(
+        'service', name=F('service__name'),
+    ).annotate(
+        quantity=Sum('quantity'), revenue=Sum('revenue'),
+    ).order_by('-revenue', 'service'))
+
+
+def overdue_backlog():
+    """Open orders past their estimate date, counted per estimate date."""
+    return list(Order.objects.overdue().values('estimate_date').annotate(
+        orders_count=Count('id'), total_sum=Coalesce(Sum('total_sum'), Decimal(0), output_field=REVENUE),
+    ).order_by('estimate_date'))
@@ -0,0 +1,80 @@
+from django.templatetags.static import static
+from django.utils.functional import cached_property
+from . models import OrderReview
+from . thumbnails import thumbnail_url
+
+REVIEWS_PER_PAGE = 10
+# Keeps the query OFFSET in range whatever page number a client sends.
+MAX_PAGE = 10000
+NO_PHOTO = 'autoservice/img/no_profile_photo.png'
+
+
+def owner_photo_url(owner):
+    profile = getattr(owner, 'profile', None)
+    if profile is not None and profile.photo:
+        return thumbnail_url(profile.photo, 'small')
+    return static(NO_PHOTO)
+
+
+class ReviewChunk:
+    """One page of an order's reviews, loaded lazily in a single query.
+
+    Owners and their profiles come joined and photo URLs are resolved once per
+    review, so rendering the chunk runs no further queries. Nothing is loaded
+    when the template serves the chunk from the fragment cache.
+    """
+
+    def __init__(self, order_id, page=1, per_page=REVIEWS_PER_PAGE):
+        self.order_id = order_id
+        self.page = page
+        self.per_page = per_page
+
+    @cached_property
+    def _rows(self):
+        start = (self.page - 1) * self.per_page
+        rows = list(
+            OrderReview.objects.filter(order_id=self.order_id).select_related('owner__profile')
+            [start:start + self.per_page + 1]
+        )
+        for review in rows:
+            review.photo_url = owner_photo_url(review.owner)
+        return rows
+
+    @property
+    def reviews(self):
+        return self._rows[:self.per_page]
+
+    def exists(self):
+        """False past the last page, the first page exists even without reviews."""
+        return self.page == 1 or bool(self._rows)
+
+    def has_next(self):
+        return len(self._rows) > self.per_page
+
+    @property
+    def next_page(self):
+        return self.page + 1 if self.has_next() else None
+
+    @property
+    def previous_page(self):
+        return self.page - 1 if self.page > 1 else None
+
+    def as_dict(self):
+        return {
+            'page': self.page,
+            'next_page': self.next_page,
+            'reviews': [{
+                'id': review.id,
+                'owner': str(review.owner),
+                'photo_url': review.photo_url,
+                'created_at': review.created_at.isoformat(),
+                'content': review.content,
+            } for review in self.reviews],
+        }
+
+
+def page_number(value):
+    try:
+        return min(max(int(value), 1), MAX_PAGE)
+    except (TypeError, ValueError):
+        return 1
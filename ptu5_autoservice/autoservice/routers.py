@@ -0,0 +1,55 @@
+"""Routes reads of safe requests to replica databases and everything else to the primary.
+
+ReplicaPinningMiddleware marks the requests that may read from a replica. Once a
+request writes, its remaining reads go to the primary, and a cookie keeps the
+client on the primary for REPLICA_PIN_SECONDS so users see their own changes
+while the replicas catch up.
+"""
+import random
+from contextvars import ContextVar
+from django.conf import settings
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Writes to these apps do not make the client read from the primary, e.g. session saves.
+UNPINNED_APPS = {'sessions'}
+
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+class RequestState:
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def begin_request(request):
+    use_replica = request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+    state = RequestState(use_replica)
+    return state, _request_state.set(state)
+
+
+def end_request(token):
+    _request_state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        replicas = getattr(settings, 'REPLICA_DATABASES', ())
+        if replicas and state is not None and state.use_replica and not state.wrote:
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None and model._meta.app_label not in UNPINNED_APPS:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'REPLICA_DATABASES', ())
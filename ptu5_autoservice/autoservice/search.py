@@ -0,0 +1,58 @@
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# The trigram tokenizer can only match terms of at least three characters.
+MIN_FTS_LENGTH = 3
+
+FTS_CAR_IDS = 'SELECT rowid FROM autoservice_car_search WHERE autoservice_car_search MATCH %s'
+# LIMIT -1 keeps SQLite from flattening the subquery, so the MATCH runs once and
+# the ranks are looked up through an automatic index instead of once per order.
+FTS_RANK = (
+    'SELECT ranked.rank FROM ('
+    'SELECT rowid, rank FROM autoservice_car_search WHERE autoservice_car_search MATCH %s ORDER BY rank LIMIT -1'
+    ') ranked WHERE ranked.rowid = "autoservice_order"."car_id"'
+)
+
+
+def fts_query(term):
+    return '"{}"'.format(term.replace('"', '""'))
+
+
+def icontains_filter(term):
+    return (
+        Q(car__owner__icontains=term) |
+        Q(car__plate_number__icontains=term) |
+        Q(car__VIN_code__icontains=term) |
+        Q(car__car_model__make__icontains=term) |
+        Q(car__car_model__model__icontains=term)
+    )
+
+
+def search_orders(queryset, term, ranked=True):
+    """Filters orders by their car owner, plate number, VIN or car model.
+
+    SQLite uses the autoservice_car_search FTS5 trigram table and PostgreSQL the
+    pg_trgm indexes from migration 0007. Ranked results come best match first.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite' and len(term) >= MIN_FTS_LENGTH:
+        match = fts_query(term)
+        queryset = queryset.filter(car_id__in=RawSQL(FTS_CAR_IDS, (match, )))
+        if ranked:
+            queryset = queryset.annotate(search_rank=RawSQL(FTS_RANK, (match, ))).order_by('search_rank', 'id')
+        return queryset
+    queryset = queryset.filter(icontains_filter(term))
+    if ranked and vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity
+        from django.db.models.functions import Greatest
+        queryset = queryset.annotate(search_rank=Greatest(
+            TrigramSimilarity('car__owner', term),
+            TrigramSimilarity('car__plate_number', term),
+            TrigramSimilarity('car__VIN_code', term),
+            TrigramSimilarity('car__car_model__model', term),
+        )).order_by('-search_rank', 'id')
+    return queryset
@@ -0,0 +1,92 @@
+"""Session engine keeping anonymous sessions in a signed cookie and logged in ones in cached_db.
+
+Anonymous visitors, who make up most of the traffic, never write to django_session,
+which only holds sessions of logged in users. Logging in moves the session data
+into the database under a fresh key, logging out moves it back to a cookie.
+"""
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends import cached_db
+from django.core import signing
+from django.utils import timezone
+
+SIGNED_SALT = 'django.contrib.sessions.backends.signed_cookies'
+
+
+class SessionStore(cached_db.SessionStore):
+    @staticmethod
+    def is_signed(session_key):
+        # Database keys are [a-z0-9] strings, signed values always contain ':'.
+        return bool(session_key) and ':' in session_key
+
+    def has_user(self):
+        return SESSION_KEY in self._session
+
+    def load(self):
+        if not self.is_signed(self.session_key):
+            return super().load()
+        try:
+            return signing.loads(
+                self.session_key,
+                serializer=self.serializer,
+                max_age=self.get_session_cookie_age(),
+                salt=SIGNED_SALT,
+            )
+        except Exception:
+            self._session_key = None
+            self.modified = True
+        return {}
+
+    def exists(self, session_key):
+        if self.is_signed(session_key):
+            return False
+        return super().exists(session_key)
+
+    def create(self):
+        if self.has_user():
+            return super().create()
+        self._session_key = None
+        self.save()
+
+    def save(self, must_create=False):
+        if self.has_user():
+            if self._session_key is None or self.is_signed(self._session_key):
+                self._session_key = None
+                return super().create()
+            return super().save(must_create)
+        if self._session_key and not self.is_signed(self._session_key):
+            # The session lost its user without a logout, drop its row.
+            super().delete(self._session_key)
+        self._session_key = signing.dumps(self._session, compress=True, salt=SIGNED_SALT, serializer=self.serializer)
+        self.modified = True
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            session_key = self.session_key
+        if not self.is_signed(session_key):
+            return super().delete(session_key)
+        if session_key == self._session_key:
+            self._session_key = ''
+            self._session_cache = {}
+            self.modified = True
+
+    def cycle_key(self):
+        if not self.is_signed(self.session_key):
+            return super().cycle_key()
+        # A signed session has no row to delete, the next save picks a new key.
+        data = self._session
+        self._session_key = None
+        self._session_cache = data
+        self.modified = True
+
+    @classmethod
+    def clear_expired(cls, batch_size=1000):
+        """Deletes expired database sessions in batches, returns how many were deleted."""
+        model = cls.get_model_class()
+        deleted = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=timezone.now()).values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                return deleted
+            deleted += model.objects.filter(session_key__in=keys).delete()[0]
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from . caching import CACHE_DEPENDENCIES, invalidate_dependents
+from . counters import change_count
+from . models import Car, Order, OrderLine, Service, totals_updated
+from . performance import time_queries
+from . reports import schedule_refresh
+from . thumbnails import thumbnails_ready
+
+
+@receiver(post_save, sender=OrderLine)
+def update_order_total(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    order_ids = {instance.order_id, getattr(instance, '_loaded_order_id', None)} - {None}
+    Order.objects.filter(pk__in=order_ids).update_totals()
+    instance._loaded_order_id = instance.order_id
+
+
+@receiver(post_delete, sender=OrderLine)
+def update_order_total_on_delete(sender, instance, **kwargs):
+    Order.objects.filter(pk=instance.order_id).update_totals()
+
+
+@receiver(totals_updated, sender=Order)
+def refresh_reports_on_totals(sender, queryset, **kwargs):
+    schedule_refresh(queryset.values_list('date', flat=True).distinct())
+
+
+@receiver(post_save, sender=Order)
+def refresh_reports_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_refresh([instance.date])
+
+
+@receiver(post_delete, sender=Order)
+def refresh_reports_on_delete(sender, instance, **kwargs):
+    schedule_refresh([instance.date])
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=Car)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_count(sender, 1)
+
+
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=Car)
+def count_deleted(sender, instance, **kwargs):
+    change_count(sender, -1)
+
+
+def invalidate_cached_content(sender, **kwargs):
+    invalidate_dependents(sender)
+
+
+# Connected per model so deletes of other models, e.g. expired sessions, stay fast deletes.
+for model in CACHE_DEPENDENCIES:
+    post_save.connect(invalidate_cached_content, sender=model)
+    post_delete.connect(invalidate_cached_content, sender=model)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@receiver(connection_created)
+def time_request_queries(sender, connection, **kwargs):
+    if getattr(settings, 'PERF_SAMPLE_RATE', 0):
+        time_queries(connection)
+
+
+@receiver(thumbnails_ready)
+def invalidate_thumbnail_pages(sender, **kwargs):
+    # Cached fragments rendered before the worker finished still point at the original image.
+    invalidate_dependents(sender)
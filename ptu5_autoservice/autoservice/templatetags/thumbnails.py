@@ -0,0 +1,9 @@
+from django import template
+from autoservice.thumbnails import thumbnail_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(field_file, size='medium'):
+    return thumbnail_url(field_file, size)
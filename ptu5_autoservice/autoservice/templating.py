@@ -0,0 +1,133 @@
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.base import Node, Template, TextNode, TokenType
+
+
+def warm_cache(engine=None):
+    """Compiles every template the loaders can find, so first requests skip parsing."""
+    engine = engine or engines['django'].engine
+    names = set()
+    for loader in engine.template_loaders:
+        for child in getattr(loader, 'loaders', [loader]):
+            for directory in map(Path, child.get_dirs()):
+                names.update(str(path.relative_to(directory)) for path in directory.rglob('*.html'))
+    compiled = 0
+    for name in sorted(names):
+        try:
+            engine.get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError):
+            continue
+        compiled += 1
+    return compiled
+
+
+_profile = ContextVar('template_profile', default=None)
+_installed = False
+
+
+class RenderProfile:
+    """Render time per template and per tag, each excluding the templates or tags nested in it."""
+
+    def __init__(self, track_tags=True):
+        self.track_tags = track_tags
+        self.templates = defaultdict(lambda: [0, 0.0])
+        self.tags = defaultdict(lambda: [0, 0.0])
+        self.template_stack = []
+        self.tag_stack = []
+        self.total = 0.0
+
+    def start(self, stack):
+        stack.append(0.0)
+        return time.perf_counter()
+
+    def stop(self, stack, stats, key, started):
+        elapsed = time.perf_counter() - started
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        elif stats is self.templates:
+            self.total += elapsed
+        entry = stats[key]
+        entry[0] += 1
+        entry[1] += elapsed - nested
+
+    def slowest(self, stats, limit):
+        rows = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [{'name': name, 'calls': calls, 'ms': round(seconds * 1000, 2)} for name, (calls, seconds) in rows]
+
+    def as_dict(self, limit=5):
+        return {
+            'total_ms': round(self.total * 1000, 2),
+            'templates': self.slowest(self.templates, limit),
+            'tags': self.slowest(self.tags, limit),
+        }
+
+    def summary(self, limit=5):
+        report = self.as_dict(limit)
+        parts = []
+        for key in ('templates', 'tags'):
+            rows = ', '.join('%(name)s %(ms).2f ms x%(calls)d' % row for row in report[key])
+            parts.append('slowest %s: %s' % (key, rows))
+        return 'templates %.2f ms; %s' % (report['total_ms'], '; '.join(parts))
+
+
+def tag_name(node):
+    token, origin = getattr(node, 'token', None), getattr(node, 'origin', None)
+    if token is None:
+        return type(node).__name__
+    if token.token_type == TokenType.BLOCK:
+        label = '{%% %s %%}' % token.contents.split()[0]
+    else:
+        label = '{{ %s }}' % token.contents
+    return '%s %s:%s' % (label, getattr(origin, 'template_name', None) or '<string>', token.lineno)
+
+
+def install():
+    """Wraps template and node rendering once per process, the wrappers only time profiled renders."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    render_template, render_node = Template._render, Node.render_annotated
+
+    def _render(self, context):
+        profile = _profile.get()
+        if profile is None:
+            return render_template(self, context)
+        name = self.origin.template_name or self.name or '<string>'
+        started = profile.start(profile.template_stack)
+        try:
+            return render_template(self, context)
+        finally:
+            profile.stop(profile.template_stack, profile.templates, name, started)
+
+    def render_annotated(self, context):
+        profile = _profile.get()
+        if profile is None or not profile.track_tags or isinstance(self, TextNode):
+            return render_node(self, context)
+        started = profile.start(profile.tag_stack)
+        try:
+            return render_node(self, context)
+        finally:
+            profile.stop(profile.tag_stack, profile.tags, tag_name(self), started)
+
+    Template._render = _render
+    Node.render_annotated = render_annotated
+
+
+def begin_profile(tags=True):
+    """Starts profiling the current request, or joins the profile an outer middleware started."""
+    profile = _profile.get()
+    if profile is not None:
+        profile.track_tags |= tags
+        return profile, None
+    profile = RenderProfile(tags)
+    return profile, _profile.set(profile)
+
+
+def end_profile(token):
+    if token is not None:
+        _profile.reset(token)
@@ -1,3 +1,1073 @@
-from django.test import TestCase
+import csv
+import json
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+from PIL import Image
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, router
+from django.http import Http404, HttpResponse
+from django.template import Context, Template, engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import AsyncClient, AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import capfirst
+from . models import CarModel, Car, Service, Order, OrderLine, OrderReview, DailyOrderStats, DailyServiceStats
+from . import async_views, performance, ratelimit, templating
+from .cache_backends import reset_metrics as reset_cache_metrics
+from .caching import aget_version, get_version
+from .counters import aget_counts, get_counts
+from .forms import UserOrderForm
+from .middleware import ReplicaPinningMiddleware
+from .pagination import CursorPaginator
+from .reviews import MAX_PAGE, ReviewChunk, page_number
+from .routers import PIN_COOKIE
+from .search import search_orders
+from .thumbnails import get_manifest, thumbnail_url
 
-# Create your tests here.
+
+def create_order(**kwargs):
+    car_model = CarModel.objects.create(year=2010, make='Audi', model='A4', engine='2.0 TDI')
+    car = Car.objects.create(car_model=car_model, plate_number='ABC123', VIN_code='WAUZZZ8K0AA000001', owner='Jonas')
+    return Order.objects.create(car=car, **kwargs)
+
+
+class OrderTotalTests(TestCase):
+    def setUp(self):
+        self.order = create_order()
+        self.oil = Service.objects.create(name='Oil change', price=Decimal('30.00'))
+        self.tyres = Service.objects.create(name='Tyres', price=Decimal('15.50'))
+
+    def assertTotal(self, order, expected):
+        order.refresh_from_db()
+        self.assertEqual(order.total_sum, Decimal(expected))
+
+    def test_line_create_update_delete(self):
+        line = OrderLine.objects.create(order=self.order, service=self.oil, quantity=2, price=Decimal('30.00'))
+        self.assertTotal(self.order, '60.00')
+        line.quantity = 3
+        line.save()
+        self.assertTotal(self.order, '90.00')
+        line.delete()
+        self.assertTotal(self.order, '0.00')
+
+    def test_line_moved_to_other_order(self):
+        other = Order.objects.create(car=self.order.car)
+        line = OrderLine.objects.create(order=self.order, service=self.oil, quantity=1, price=Decimal('30.00'))
+        line = OrderLine.objects.get(pk=line.pk)
+        line.order = other
+        line.save()
+        self.assertTotal(self.order, '0.00')
+        self.assertTotal(other, '30.00')
+
+    def test_bulk_create_and_queryset_update(self):
+        OrderLine.objects.bulk_create([
+            OrderLine(order=self.order, service=self.oil, quantity=1, price=Decimal('30.00')),
+            OrderLine(order=self.order, service=self.tyres, quantity=4, price=Decimal('15.50')),
+        ])
+        self.assertTotal(self.order, '92.00')
+        OrderLine.objects.filter(service=self.tyres).update(quantity=2)
+        self.assertTotal(self.order, '61.00')
+        OrderLine.objects.filter(service=self.oil).delete()
+        self.assertTotal(self.order, '31.00')
+
+    def test_recalculate_totals_command(self):
+        OrderLine.objects.create(order=self.order, service=self.oil, quantity=1, price=Decimal('30.00'))
+        Order.objects.filter(pk=self.order.pk).update(total_sum=Decimal('1.00'))
+        call_command('recalculate_totals', batch_size=1, stdout=StringIO())
+        self.assertTotal(self.order, '30.00')
+
+
+class QueryBudgetMixin:
+    """Fails a test when rendering a URL takes more queries than its budget."""
+
+    def assertMaxQueries(self, budget, url, method='get', data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, url)
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(query['sql'] for query in context.captured_queries)
+            self.fail(f'{url} executed {executed} queries, budget is {budget}:\n{queries}')
+        return response
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+        service = Service.objects.create(name='Oil change', price=Decimal('30.00'))
+        for number in range(5):
+            car_model = CarModel.objects.create(year=2010, make='Audi', model=f'A{number}', engine='2.0')
+            car = Car.objects.create(
+                car_model=car_model, plate_number=f'ABC00{number}', VIN_code=f'VIN{number:014d}', owner='Jonas'
+            )
+            order = Order.objects.create(car=car, reader=cls.user)
+            OrderLine.objects.create(order=order, service=service, quantity=1, price=Decimal('30.00'))
+            OrderLine.objects.create(order=order, service=service, quantity=2, price=Decimal('30.00'))
+            OrderReview.objects.create(order=order, owner=cls.user, content='Fast service')
+        cls.order = order
+        cls.car = car
+
+    def setUp(self):
+        cache.clear()
+
+    def test_public_pages(self):
+        self.assertMaxQueries(5, reverse('index'))
+        self.assertMaxQueries(3, reverse('cars'))
+        self.assertMaxQueries(2, reverse('car_info', args=(self.car.id,)))
+        self.assertMaxQueries(3, reverse('orders'))
+        self.assertMaxQueries(3, reverse('orders'), data={'search': 'ABC'})
+        self.assertMaxQueries(7, reverse('order', args=(self.order.id,)))
+        self.assertMaxQueries(3, reverse('order_reviews', args=(self.order.id,)))
+
+    def test_user_pages(self):
+        self.client.force_login(self.user)
+        self.assertMaxQueries(3, reverse('user_orders'))
+        self.assertMaxQueries(4, reverse('user_order_create'))
+        self.assertMaxQueries(3, reverse('user_order_update', args=(self.order.id,)))
+        self.assertMaxQueries(3, reverse('user_order_delete', args=(self.order.id,)))
+
+    def test_staff_pages(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        self.assertMaxQueries(4, reverse('export_orders'))
+        self.assertMaxQueries(4, reverse('export_orders'), data={'format': 'jsonl'})
+        self.assertMaxQueries(3, reverse('report_orders'))
+        self.assertMaxQueries(3, reverse('report_revenue'))
+        self.assertMaxQueries(3, reverse('report_overdue'))
+        self.assertMaxQueries(2, reverse('cache_metrics'))
+        self.assertMaxQueries(2, reverse('performance_metrics'))
+
+    def test_async_pages(self):
+        for budget, view, kwargs in [
+            (4, async_views.index, {}),
+            (3, async_views.cars, {}),
+            (2, async_views.car_info, {'car_id': self.car.id}),
+            (3, async_views.order_list, {}),
+            (5, async_views.order_detail, {'pk': self.order.id}),
+        ]:
+            request = AsyncRequestFactory().get('/')
+            request.session = SessionStore()
+            request.user = AnonymousUser()
+            with CaptureQueriesContext(connection) as context:
+                async_to_sync(view)(request, **kwargs)
+            self.assertLessEqual(len(context.captured_queries), budget, view.__name__)
+
+
+class OrderSearchTests(TestCase):
+    def setUp(self):
+        self.order = create_order()
+
+    def search(self, term):
+        return list(search_orders(Order.objects.all(), term))
+
+    def test_matches_car_and_model_fields(self):
+        for term in ('jon', 'BC12', '8K0AA', 'audi', 'A4'):
+            self.assertEqual(self.search(term), [self.order], term)
+        self.assertEqual(self.search('volvo'), [])
+
+    def test_index_follows_car_and_model_changes(self):
+        car = self.order.car
+        car.owner = 'Petras'
+        car.save()
+        self.assertEqual(self.search('Petras'), [self.order])
+        self.assertEqual(self.search('Jonas'), [])
+        car.car_model.model = 'Passat'
+        car.car_model.save()
+        self.assertEqual(self.search('passat'), [self.order])
+        car.delete()
+        self.assertEqual(self.search('Petras'), [])
+
+    def test_quotes_are_escaped(self):
+        self.assertEqual(self.search('"Jonas'), [])
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.orders = [create_order()]
+        self.orders += [Order.objects.create(car=self.orders[0].car) for _ in range(6)]
+
+    def test_walks_forward_and_back(self):
+        paginator = CursorPaginator(Order.objects.all(), 3)
+        first = paginator.page()
+        self.assertEqual(first.object_list, self.orders[:3])
+        self.assertFalse(first.has_previous())
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(second.object_list, self.orders[3:6])
+        self.assertEqual(third.object_list, self.orders[6:])
+        self.assertFalse(third.has_next())
+        self.assertEqual(paginator.page(third.previous_cursor).object_list, self.orders[3:6])
+        self.assertEqual(paginator.page(second.previous_cursor).object_list, self.orders[:3])
+
+    def test_tampered_cursor_starts_over(self):
+        page = CursorPaginator(Order.objects.all(), 3).page('not-a-cursor')
+        self.assertEqual(page.object_list, self.orders[:3])
+
+    @override_settings(AUTOSERVICE_CURSOR_PAGINATION=True)
+    def test_order_list_in_cursor_mode(self):
+        response = self.client.get(reverse('orders'))
+        self.assertEqual(list(response.context['order_list']), self.orders[:3])
+        self.assertEqual(response.context['orders_count'], 7)
+        response = self.client.get(reverse('orders'), {'cursor': response.context['page_obj'].next_cursor})
+        self.assertEqual(list(response.context['order_list']), self.orders[3:6])
+
+
+class DashboardCounterTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        create_order()
+
+    def test_counts_follow_saves_and_deletes(self):
+        self.assertEqual(get_counts(), {'service_count': 0, 'order_count': 1, 'car_count': 1})
+        Service.objects.create(name='Oil change', price=Decimal('30.00'))
+        Order.objects.first().delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_counts(), {'service_count': 1, 'order_count': 0, 'car_count': 1})
+
+    def test_repeated_visits_do_not_write(self):
+        self.client.get(reverse('index'))
+        self.assertMaxQueries(1, reverse('index'))
+        for visit in range(3, 10):
+            response = self.client.get(reverse('index'))
+            self.assertEqual(response.context['visits_count'], visit)
+
+
+class CachedContentTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_metrics()
+        self.order = create_order()
+        self.user = get_user_model().objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+
+    def test_car_info_fragment_follows_car_changes(self):
+        url = reverse('car_info', args=(self.order.car.id,))
+        self.client.get(url)
+        self.assertContains(self.client.get(url), 'Jonas')
+        car = self.order.car
+        car.owner = 'Petras'
+        car.save()
+        self.assertContains(self.client.get(url), 'Petras')
+        car.car_model.model = 'Passat'
+        car.car_model.save()
+        self.assertContains(self.client.get(url), 'Passat')
+
+    def test_review_list_is_cached_until_a_review_changes(self):
+        url = reverse('order', args=(self.order.id,))
+        OrderReview.objects.create(order=self.order, owner=self.user, content='First review')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            self.assertContains(self.client.get(url), 'First review')
+        self.assertFalse(any('orderreview' in query['sql'] for query in context.captured_queries))
+        OrderReview.objects.create(order=self.order, owner=self.user, content='Second review')
+        self.assertContains(self.client.get(url), 'Second review')
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('car_info', args=(self.order.car.id,)))
+        self.client.get(reverse('car_info', args=(self.order.car.id,)))
+        self.assertEqual(self.client.get(reverse('cache_metrics')).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        metrics = self.client.get(reverse('cache_metrics')).json()
+        self.assertGreater(metrics['autoservice']['hits'], 0)
+        self.assertGreater(metrics['autoservice']['misses'], 0)
+
+
+class SingleObjectQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+        self.order = create_order(reader=self.user)
+        self.client.force_login(self.user)
+
+    def test_order_detail(self):
+        url = reverse('order', args=(self.order.id,))
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        with self.assertNumQueries(7):
+            self.client.post(url, {'content': 'Thanks', 'order': self.order.id, 'owner': self.user.id})
+
+    def test_user_order_update(self):
+        url = reverse('user_order_update', args=(self.order.id,))
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        with self.assertNumQueries(5):
+            self.client.post(url, {'car': self.order.car.id, 'estimate_date': '2030-01-01'})
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'a')
+
+    def test_user_order_delete(self):
+        url = reverse('user_order_delete', args=(self.order.id,))
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        with self.assertNumQueries(5):
+            self.client.post(url)
+        self.assertFalse(Order.objects.filter(pk=self.order.pk).exists())
+
+    def test_other_users_cannot_edit(self):
+        other = get_user_model().objects.create_user('petras', 'petras@example.com', 'secret-pass-123')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('user_order_update', args=(self.order.id,))).status_code, 403)
+        self.assertEqual(self.client.post(reverse('user_order_delete', args=(self.order.id,))).status_code, 403)
+
+
+class ReviewChunkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.order = create_order()
+        self.user = get_user_model().objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+        OrderReview.objects.bulk_create(
+            OrderReview(order=self.order, owner=self.user, content=f'Review {number}') for number in range(12)
+        )
+
+    def test_chunk_renders_in_one_query(self):
+        chunk = ReviewChunk(self.order.id)
+        with self.assertNumQueries(1):
+            photos = [review.photo_url for review in chunk.reviews]
+            self.assertTrue(chunk.has_next())
+        self.assertEqual(len(photos), 10)
+        self.assertFalse(ReviewChunk(self.order.id, page=2).has_next())
+
+    def test_json_endpoint(self):
+        url = reverse('order_reviews', args=(self.order.id,))
+        data = self.client.get(url, {'page': 2}).json()
+        self.assertEqual(len(data['reviews']), 2)
+        self.assertIsNone(data['next_page'])
+        self.assertEqual(self.client.get(reverse('order_reviews', args=(0,))).status_code, 404)
+
+    def test_pages_past_the_last_one(self):
+        url = reverse('order_reviews', args=(self.order.id,))
+        for page in (3, 99999999999999999999):
+            self.assertEqual(self.client.get(url, {'page': page}).status_code, 404)
+            response = self.client.get(reverse('order', args=(self.order.id,)), {'reviews_page': page})
+            self.assertEqual(response.status_code, 404)
+        self.assertEqual(ReviewChunk(self.order.id, page_number('99999999999999999999')).page, MAX_PAGE)
+        OrderReview.objects.all().delete()
+        self.assertEqual(self.client.get(url).json()['reviews'], [])
+
+
+def image_file(name='cover.png', size=(800, 600)):
+    output = BytesIO()
+    Image.new('RGB', size, 'red').save(output, format='PNG')
+    return SimpleUploadedFile(name, output.getvalue(), content_type='image/png')
+
+
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, THUMBNAILS_ASYNC=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_cover_thumbnails_are_generated_after_commit(self):
+        car = create_order().car
+        car.cover = image_file()
+        with self.captureOnCommitCallbacks(execute=True):
+            car.save()
+        self.assertEqual(thumbnail_url(car.cover, 'medium')[-5:], '.webp')
+        manifest = get_manifest(car.cover.name)
+        self.assertEqual(set(manifest), {'small', 'medium', 'large'})
+        with default_storage.open(manifest['medium']) as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (300, 225))
+
+    def test_ready_thumbnails_invalidate_cached_pages(self):
+        car = create_order().car
+        car.cover = image_file()
+        with self.captureOnCommitCallbacks() as callbacks:
+            car.save()
+        version = get_version(Car)
+        self.assertContains(self.client.get(reverse('cars')), car.cover.url)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_version(Car), version)
+        self.assertContains(self.client.get(reverse('cars')), thumbnail_url(car.cover, 'medium'))
+
+    def test_original_is_served_until_thumbnails_exist(self):
+        car = create_order().car
+        car.cover = image_file()
+        car.save()
+        self.assertEqual(thumbnail_url(car.cover, 'medium'), car.cover.url)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked with SQLite EXPLAIN QUERY PLAN')
+class QueryPlanTests(TestCase):
+    """Fails when a hot query stops using an index and scans the whole table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+        cls.order = create_order(reader=cls.user)
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            if re.search(r'\bSCAN (autoservice_\w+|auth_user)\b', line) and 'INDEX' not in line:
+                self.fail(f'Full table scan in query plan:\n{plan}\n\n{queryset.query}')
+
+    def test_user_orders(self):
+        self.assertNoFullScan(Order.objects.filter(reader=self.user).select_related('car'))
+
+    def test_recent_reviews_of_owner(self):
+        since = timezone.now() - timedelta(minutes=1)
+        self.assertNoFullScan(OrderReview.objects.filter(owner=self.user, created_at__gte=since))
+
+    def test_reviews_of_order(self):
+        self.assertNoFullScan(OrderReview.objects.filter(order=self.order)[:11])
+
+    def test_orders_by_status_and_estimate_date(self):
+        today = timezone.now().date()
+        self.assertNoFullScan(Order.objects.filter(status='n', estimate_date__lt=today))
+        self.assertNoFullScan(Order.objects.filter(estimate_date__lt=today))
+
+    def test_car_lookups(self):
+        self.assertNoFullScan(Car.objects.filter(VIN_code='WAUZZZ8K0AA000001'))
+        self.assertNoFullScan(Car.objects.filter(plate_number='ABC123'))
+
+    def test_keyset_page(self):
+        paginator = CursorPaginator(Order.objects.all(), 3)
+        condition = paginator.keyset_filter([str(self.order.date), str(self.order.id)], backwards=False)
+        self.assertNoFullScan(Order.objects.filter(condition).order_by('date', 'id')[:4])
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+        self.order = create_order(reader=self.user)
+        self.client.force_login(self.user)
+
+    def post_review(self, content):
+        url = reverse('order', args=(self.order.id,))
+        return self.client.post(url, {'content': content, 'order': self.order.id, 'owner': self.user.id})
+
+    def test_second_review_within_a_minute_is_rejected(self):
+        self.assertEqual(self.post_review('First').status_code, 302)
+        response = self.post_review('Second')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 60)
+        self.assertEqual(OrderReview.objects.count(), 1)
+
+    def test_invalid_review_does_not_use_the_limit(self):
+        self.assertEqual(self.post_review('').status_code, 200)
+        self.assertEqual(self.post_review('First').status_code, 302)
+
+    @override_settings(RATE_LIMITS={'order_create': (1, 60)})
+    def test_order_creation_limit(self):
+        url = reverse('user_order_create')
+        self.assertEqual(self.client.post(url, {'car': self.order.car.id}).status_code, 302)
+        self.assertEqual(self.client.post(url, {'car': self.order.car.id}).status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(RATE_LIMITS={'review': (2, 60)})
+    def test_sliding_window(self):
+        with patch('autoservice.ratelimit.time.time', return_value=1000):
+            ratelimit.record('review', 'user:1')
+        with patch('autoservice.ratelimit.time.time', return_value=1030):
+            ratelimit.record('review', 'user:1')
+            self.assertEqual(ratelimit.retry_after('review', 'user:1'), 30)
+        with patch('autoservice.ratelimit.time.time', return_value=1061):
+            self.assertEqual(ratelimit.retry_after('review', 'user:1'), 0)
+
+
+class OrderImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.existing = create_order().car
+        self.service = Service.objects.create(name='Oil change', price=Decimal('30.00'))
+        self.csv_rows = '\n'.join([
+            'order,vin,plate_number,owner,car_model,status,estimate_date,service,quantity,price',
+            f'1,{self.existing.VIN_code},,,,n,2030-01-01,{self.service.id},2,',
+            f'1,{self.existing.VIN_code},,,,n,2030-01-01,{self.service.id},1,12.50',
+            f'2,NEWVIN00000000001,XYZ999,Petras,{self.existing.car_model_id},w,,{self.service.id},1,',
+            f'3,NEWVIN00000000001,XYZ999,Petras,{self.existing.car_model_id},n,,,,',
+        ])
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write(self.csv_rows)
+            source.flush()
+            call_command('import_orders', source.name, batch_size=2, stdout=StringIO())
+        self.assertEqual(Car.objects.count(), 2)
+        totals = list(Order.objects.order_by('id').values_list('total_sum', flat=True)[1:])
+        self.assertEqual(totals, [Decimal('72.50'), Decimal('30.00'), Decimal('0.00')])
+        self.assertFalse(Order.objects.drifted().exists())
+        self.assertEqual(search_orders(Order.objects.all(), 'Petras').count(), 2)
+
+    def test_import_endpoint(self):
+        staff = get_user_model().objects.create_user('admin', 'admin@example.com', 'secret-pass-123', is_staff=True)
+        self.client.force_login(staff)
+        lines = '\n'.join(json.dumps(row) for row in [
+            {'order': 'a', 'vin': self.existing.VIN_code, 'service': self.service.id, 'quantity': 3},
+            {'order': 'b', 'vin': 'NEWVIN00000000002', 'car_model': self.existing.car_model_id},
+        ])
+        upload = SimpleUploadedFile('orders.jsonl', lines.encode())
+        response = self.client.post(reverse('import_orders'), {'file': upload})
+        self.assertEqual(response.json()['imported'], {'cars': 1, 'orders': 2, 'order_lines': 1, 'rows': 2})
+        upload = SimpleUploadedFile('orders.jsonl', b'{"order": "c", "vin": "UNKNOWN"}')
+        response = self.client.post(reverse('import_orders'), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('car_model is required', response.json()['error'])
+
+    def test_import_endpoint_rejects_invalid_rows(self):
+        staff = get_user_model().objects.create_user('admin', 'admin@example.com', 'secret-pass-123', is_staff=True)
+        self.client.force_login(staff)
+        order = {'order': 'a', 'vin': self.existing.VIN_code}
+        order_line = {**order, 'service': self.service.id}
+        for line, error in [
+            ({'order': 'a', 'vin': 'NEWVIN00000000002', 'car_model': 999}, 'unknown car_model 999'),
+            ({**order, 'service': 999, 'price': '10'}, 'unknown service 999'),
+            ([1, 2], 'expected an object'),
+            ({'vin': self.existing.VIN_code}, 'order is required'),
+            ({'order': 'a', 'vin': 'V' * 30, 'car_model': self.existing.car_model_id}, 'VIN_code'),
+            ({**order, 'estimate_date': '01/02/2030'}, 'invalid estimate_date'),
+            ({**order, 'estimate_date': '2030-13-01'}, 'Row 1: invalid'),
+            ({**order_line, 'quantity': 1.5}, 'quantity has to be'),
+            ({**order_line, 'quantity': -1}, 'quantity has to be'),
+            ({**order_line, 'price': 'NaN'}, 'price has to be'),
+            ({**order_line, 'price': '-5'}, 'price has to be'),
+        ]:
+            upload = SimpleUploadedFile('orders.jsonl', json.dumps(line).encode())
+            response = self.client.post(reverse('import_orders'), {'file': upload})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(error, response.json()['error'])
+        upload = SimpleUploadedFile('orders.jsonl', '\n'.join(json.dumps(row) for row in [
+            {'order': 'a', 'vin': 'NEWVIN00000000002', 'car_model': self.existing.car_model_id},
+            {'order': 'a', 'vin': 'NEWVIN00000000002', 'service': 999},
+        ]).encode())
+        response = self.client.post(reverse('import_orders'), {'file': upload})
+        self.assertEqual(response.json()['imported'], {})
+        self.assertEqual(Car.objects.count(), 1)
+
+    def test_failed_batch_keeps_bookkeeping_of_committed_ones(self):
+        self.assertEqual(get_counts()['car_count'], 1)
+        version = get_version(Car)
+        rows = '\n'.join([
+            'order,vin,car_model,service',
+            f'1,NEWVIN00000000001,{self.existing.car_model_id},{self.service.id}',
+            f'2,NEWVIN00000000002,{self.existing.car_model_id},999',
+        ])
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write(rows)
+            source.flush()
+            with self.assertRaisesMessage(CommandError, "'cars': 1, 'orders': 1"):
+                call_command('import_orders', source.name, batch_size=1, stdout=StringIO())
+        self.assertEqual(get_counts()['car_count'], 2)
+        self.assertNotEqual(get_version(Car), version)
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.order = create_order(status='w')
+        service = Service.objects.create(name='Oil change', price=Decimal('30.00'))
+        OrderLine.objects.create(order=self.order, service=service, quantity=2, price=Decimal('30.00'))
+        Order.objects.create(car=self.order.car, status='n')
+        staff = get_user_model().objects.create_user('admin', 'admin@example.com', 'secret-pass-123', is_staff=True)
+        self.client.force_login(staff)
+
+    def export(self, **params):
+        response = self.client.get(reverse('export_orders'), params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(StringIO(self.export(status='w'))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['total_sum'], '60.00')
+        self.assertEqual(rows[0]['lines'], 'Oil change x 2 @ 30.00')
+
+    def test_jsonl_with_filters(self):
+        rows = [json.loads(line) for line in self.export(format='jsonl', search='Jonas').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.order.id, self.order.id + 1])
+        self.assertEqual(rows[0]['lines'][0]['total_sum'], '60.00')
+        self.assertEqual(self.export(format='jsonl', date_to='2000-01-01'), '')
+
+    def test_export_command(self):
+        output = StringIO()
+        call_command('export_orders', format='jsonl', stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
+        output = StringIO()
+        call_command('export_orders', '--date-to=2000-01-01', stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 1)
+        with self.assertRaisesMessage(CommandError, '--date-from'):
+            call_command('export_orders', '--date-from=2020-13-01', stdout=StringIO())
+
+    def test_invalid_dates(self):
+        for params in ({'date_from': 'abc'}, {'date_from': '2020-13-01'}, {'date_to': '2020-02-30'}):
+            response = self.client.get(reverse('export_orders'), params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('YYYY-MM-DD', response.json()['error'])
+
+
+class ReportTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order = create_order(status='w', estimate_date=timezone.localdate() - timedelta(days=2))
+            self.oil = Service.objects.create(name='Oil change', price=Decimal('30.00'))
+            self.line = OrderLine.objects.create(order=self.order, service=self.oil, quantity=2, price=Decimal('30.00'))
+        self.today = timezone.localdate()
+
+    def test_rollups_follow_changes(self):
+        stats = DailyOrderStats.objects.get(day=self.today)
+        self.assertEqual((stats.orders_count, stats.open_count, stats.revenue), (1, 1, Decimal('60.00')))
+        self.assertEqual(DailyServiceStats.objects.get(day=self.today, service=self.oil).quantity, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderLine.objects.filter(pk=self.line.pk).update(quantity=3)
+        self.assertEqual(DailyOrderStats.objects.get(day=self.today).revenue, Decimal('90.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.status = 'c'
+            self.order.save()
+        stats = DailyOrderStats.objects.get(day=self.today)
+        self.assertEqual((stats.orders_count, stats.open_count, stats.revenue), (1, 0, Decimal('0.00')))
+        self.assertFalse(DailyServiceStats.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.delete()
+        self.assertFalse(DailyOrderStats.objects.exists())
+
+    def test_refresh_command_rebuilds(self):
+        DailyOrderStats.objects.all().delete()
+        DailyServiceStats.objects.all().delete()
+        call_command('refresh_reports', stdout=StringIO())
+        self.assertEqual(DailyOrderStats.objects.get(day=self.today).revenue, Decimal('60.00'))
+        self.assertEqual(DailyServiceStats.objects.count(), 1)
+
+    def test_endpoints(self):
+        staff = get_user_model().objects.create_user('admin', 'admin@example.com', 'secret-pass-123', is_staff=True)
+        self.client.force_login(staff)
+        with self.assertNumQueries(2):
+            days = self.client.get(reverse('report_orders')).json()['days']
+        self.assertEqual(days, [{'day': str(self.today), 'orders_count': 1, 'open_count': 1, 'revenue': '60.00'}])
+        services = self.client.get(reverse('report_revenue'), {'from': '2000-01-01'}).json()['services']
+        self.assertEqual([(row['name'], row['quantity'], Decimal(row['revenue'])) for row in services], [
+            ('Oil change', 2, Decimal('60.00')),
+        ])
+        backlog = self.client.get(reverse('report_overdue')).json()['backlog']
+        self.assertEqual([row['orders_count'] for row in backlog], [1])
+
+    def test_invalid_dates(self):
+        staff = get_user_model().objects.create_user('admin', 'admin@example.com', 'secret-pass-123', is_staff=True)
+        self.client.force_login(staff)
+        for params in (
+            {'from': '2020-02-30'}, {'to': '2020-13-13'}, {'from': 'last week'}, {'from': '2020-01-10', 'to': '2020-01-01'},
+        ):
+            for name in ('report_orders', 'report_revenue'):
+                response = self.client.get(reverse(name), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('YYYY-MM-DD', response.json()['error'])
+        with self.assertRaisesMessage(CommandError, '--from'):
+            call_command('refresh_reports', '--from=2020-02-30', stdout=StringIO())
+
+
+class OverdueOrderTests(TestCase):
+    def setUp(self):
+        self.reader = get_user_model().objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.late = create_order(status='w', estimate_date=yesterday, reader=self.reader)
+        self.done = Order.objects.create(car=self.late.car, status='d', estimate_date=yesterday)
+        self.on_time = Order.objects.create(car=self.late.car, status='w', estimate_date=timezone.localdate())
+
+    def test_overdue_queryset(self):
+        self.assertQuerysetEqual(Order.objects.overdue(), [self.late])
+        flags = dict(Order.objects.with_overdue().values_list('pk', 'overdue'))
+        self.assertEqual(flags, {self.late.pk: True, self.done.pk: False, self.on_time.pk: False})
+        self.assertTrue(self.late.is_overdue)
+        self.assertFalse(self.done.is_overdue)
+
+    def test_admin_filter_and_ordering(self):
+        staff = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'secret-pass-123')
+        self.client.force_login(staff)
+        url = reverse('admin:autoservice_order_changelist')
+        response = self.client.get(url, {'overdue': 'yes'})
+        self.assertEqual([order.pk for order in response.context['cl'].result_list], [self.late.pk])
+        response = self.client.get(url, {'o': '6'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_notify_command_flags_once(self):
+        call_command('notify_overdue', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['jonas@example.com'])
+        self.late.refresh_from_db()
+        self.assertIsNotNone(self.late.overdue_notified_at)
+        call_command('notify_overdue', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        Order.objects.filter(pk=self.late.pk).update(estimate_date=timezone.localdate())
+        call_command('notify_overdue', stdout=StringIO())
+        self.late.refresh_from_db()
+        self.assertIsNone(self.late.overdue_notified_at)
+
+
+class AdminQueryTests(TestCase):
+    def setUp(self):
+        self.order = create_order()
+        self.service = Service.objects.create(name='Oil change', price=Decimal('30.00'))
+        staff = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'secret-pass-123')
+        self.client.force_login(staff)
+
+    def add_orders(self, count):
+        orders = Order.objects.bulk_create(Order(car=self.order.car) for _ in range(count))
+        OrderLine.objects.bulk_create(
+            OrderLine(order=order, service=self.service, price=Decimal('30.00')) for order in orders
+        )
+
+    def count_queries(self, url, **params):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = [
+            reverse('admin:autoservice_order_changelist'),
+            reverse('admin:autoservice_orderline_changelist'),
+            reverse('admin:autoservice_car_changelist'),
+        ]
+        self.add_orders(2)
+        before = [self.count_queries(url) for url in urls]
+        self.add_orders(10)
+        self.assertEqual([self.count_queries(url) for url in urls], before)
+
+    def test_changelist_skips_full_count(self):
+        url = reverse('admin:autoservice_order_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'status': 'n'})
+        counts = [query['sql'] for query in queries if 'COUNT(' in query['sql'] and 'autoservice_order' in query['sql']]
+        self.assertEqual(len(counts), 1)
+
+    def test_car_autocomplete(self):
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'term': 'ABC', 'app_label': 'autoservice', 'model_name': 'order', 'field_name': 'car',
+        })
+        self.assertEqual([result['id'] for result in response.json()['results']], [str(self.order.car.pk)])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite pragmas')
+class SqlitePragmaTests(TestCase):
+    def test_pragmas_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def route(self, method='get', cookies=None, write=None):
+        reads = []
+
+        def view(request):
+            reads.append(router.db_for_read(Order))
+            if write is not None:
+                router.db_for_write(write)
+                reads.append(router.db_for_read(Order))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        response = ReplicaPinningMiddleware(view)(request)
+        return reads, response
+
+    def test_safe_requests_read_from_replica(self):
+        reads, response = self.route()
+        self.assertEqual(reads, ['replica'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_writes_pin_the_client(self):
+        reads, response = self.route('post', write=Order)
+        self.assertEqual(reads, ['default', 'default'])
+        self.assertIn(PIN_COOKIE, response.cookies)
+        reads, response = self.route(cookies={PIN_COOKIE: '1'})
+        self.assertEqual(reads, ['default'])
+
+    def test_session_writes_do_not_pin(self):
+        reads, response = self.route(write=Session)
+        self.assertEqual(reads, ['replica', 'replica'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self):
+        reads, response = self.route('post', write=Order)
+        self.assertEqual(reads, ['default', 'default'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_order_create_sets_pin_cookie(self):
+        order = create_order()
+        user = get_user_model().objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+        self.client.force_login(user)
+        with override_settings(REPLICA_DATABASES=['default']):
+            response = self.client.post(reverse('user_order_create'), {'car': order.car.pk})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.order = create_order()
+        service = Service.objects.create(name='Oil change', price=Decimal('30.00'))
+        OrderLine.objects.create(order=self.order, service=service, quantity=2, price=Decimal('30.00'))
+        cache.clear()
+
+    def request(self, path='/'):
+        request = AsyncRequestFactory().get(path)
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        return request
+
+    async def test_pages(self):
+        response = await async_views.index(self.request())
+        self.assertContains(response, 'Visit this session')
+        response = await async_views.cars(self.request())
+        self.assertContains(response, 'ABC123')
+        response = await async_views.car_info(self.request(), car_id=self.order.car.pk)
+        self.assertContains(response, 'ABC123')
+        response = await async_views.order_list(self.request())
+        self.assertContains(response, '1 Orders')
+        response = await async_views.order_detail(self.request(), pk=self.order.pk)
+        self.assertContains(response, 'Oil change')
+
+    async def test_missing_objects(self):
+        with self.assertRaises(Http404):
+            await async_views.car_info(self.request(), car_id=0)
+        with self.assertRaises(Http404):
+            await async_views.order_detail(self.request(), pk=0)
+        with self.assertRaises(Http404):
+            await async_views.order_detail(self.request('/?reviews_page=2'), pk=self.order.pk)
+
+    async def test_counts(self):
+        counts = await aget_counts()
+        self.assertEqual(counts, {'service_count': 1, 'order_count': 1, 'car_count': 1})
+
+    async def test_versions(self):
+        version = await aget_version(Car, Order)
+        self.assertEqual(version, await sync_to_async(get_version)(Car, Order))
+
+
+class HybridSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+
+    def session_key(self):
+        return self.client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def test_anonymous_sessions_stay_in_cookie(self):
+        for _ in range(settings.VISITS_FLUSH_EVERY + 1):
+            self.client.get(reverse('index'))
+        self.assertIn(':', self.session_key())
+        self.assertFalse(Session.objects.exists())
+        self.assertIn('visits_count', self.client.session)
+
+    def test_login_moves_session_to_database_and_logout_back(self):
+        self.client.get(reverse('index'))
+        anonymous_key = self.session_key()
+        self.client.post(reverse('login'), {'username': 'jonas', 'password': 'secret-pass-123'})
+        key = self.session_key()
+        self.assertNotIn(':', key)
+        self.assertNotEqual(key, anonymous_key)
+        self.assertEqual(Session.objects.get().session_key, key)
+        self.assertEqual(self.client.session['visits_count'], 2)
+        self.client.post(reverse('logout'))
+        self.assertFalse(Session.objects.exists())
+
+    def test_tampered_cookie_starts_new_session(self):
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'forged:value:signature'
+        response = self.client.get(reverse('index'))
+        self.assertEqual(response.context['visits_count'], 1)
+
+    def test_cleanup_deletes_expired_in_batches(self):
+        past, future = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{number:04}', session_data='', expire_date=past) for number in range(5)]
+            + [Session(session_key='current0001', session_data='', expire_date=future)]
+        )
+        output = StringIO()
+        with self.assertNumQueries(7):
+            call_command('cleanup_sessions', batch_size=2, stdout=output)
+        self.assertIn('Deleted 5 expired sessions', output.getvalue())
+        self.assertQuerysetEqual(Session.objects.values_list('session_key', flat=True), ['current0001'])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_cleanup_refuses_engines_without_batches(self):
+        with self.assertRaisesMessage(CommandError, 'use clearsessions'):
+            call_command('cleanup_sessions', stdout=StringIO())
+
+
+@override_settings(TEMPLATE_PROFILER=True)
+class TemplateProfilingTests(TestCase):
+    def test_logs_slowest_templates_and_tags(self):
+        order = create_order()
+        with self.assertLogs('autoservice.middleware', 'INFO') as logs:
+            response = self.client.get(reverse('order', args=(order.pk,)))
+        report = logs.records[0].template_profile
+        self.assertIn('autoservice/order_detail.html', [row['name'] for row in report['templates']])
+        self.assertTrue(all(row['name'].startswith(('{%', '{{')) for row in report['tags']))
+        self.assertIn('autoservice/base.html', response.wsgi_request.template_profile.templates)
+
+    def test_nested_time_is_not_counted_twice(self):
+        templating.install()
+        profile, token = templating.begin_profile()
+        try:
+            Template('{% for item in items %}{{ item }}{% endfor %}').render(Context({'items': 'abc'}))
+        finally:
+            templating.end_profile(token)
+        self.assertEqual(profile.tags['{% for %} <string>:1'][0], 1)
+        self.assertEqual(profile.tags['{{ item }} <string>:1'][0], 3)
+        self.assertLessEqual(sum(seconds for calls, seconds in profile.tags.values()), profile.total)
+
+    @override_settings(TEMPLATE_PROFILER=False)
+    def test_disabled_by_default(self):
+        with self.assertNoLogs('autoservice.middleware', 'INFO'):
+            response = self.client.get(reverse('index'))
+        self.assertFalse(hasattr(response.wsgi_request, 'template_profile'))
+
+
+class TemplateCacheTests(TestCase):
+    def test_warm_cache_compiles_app_templates(self):
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIsInstance(loader, CachedLoader)
+        loader.reset()
+        self.assertGreater(templating.warm_cache(), 0)
+        self.assertIn('autoservice/order_detail.html', loader.get_template_cache)
+
+
+@override_settings(PERF_SAMPLE_RATE=1.0)
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        performance.reset_metrics()
+        # The test connection was opened before PERF_SAMPLE_RATE was overridden.
+        performance.install()
+        self.order = create_order()
+
+    def get_logged(self, url):
+        with self.assertLogs('autoservice.middleware', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+        return response, logs.records[-1].performance, len(context.captured_queries)
+
+    def test_records_queries_cache_and_templates(self):
+        response, record, queries = self.get_logged(reverse('order', args=(self.order.pk,)))
+        self.assertEqual(record['view'], 'order')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['db_queries'], queries)
+        self.assertGreater(record['cache_hits'] + record['cache_misses'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertTrue(response['Server-Timing'].startswith('total;dur='))
+        self.assertIn(f'desc="{queries} queries"', response['Server-Timing'])
+
+    def test_histograms_per_url_name(self):
+        with self.assertLogs('autoservice.middleware', 'INFO'):
+            self.client.get(reverse('cars'))
+            self.client.get(reverse('cars'))
+            self.client.get('/missing/')
+        metrics = performance.get_metrics()
+        self.assertEqual(metrics['cars']['count'], 2)
+        self.assertEqual(sum(metrics['cars']['buckets'].values()), 2)
+        self.assertEqual(metrics['<unresolved>']['count'], 1)
+
+        staff = get_user_model().objects.create_user('admin', 'admin@example.com', 'secret-pass-123', is_staff=True)
+        self.client.force_login(staff)
+        with self.assertLogs('autoservice.middleware', 'INFO'):
+            response = self.client.get(reverse('performance_metrics'))
+        self.assertEqual(response.json()['cars']['count'], 2)
+
+    def test_sampling(self):
+        with override_settings(PERF_SAMPLE_RATE=0.5), patch('autoservice.middleware.random.random', return_value=0.9):
+            response = self.client.get(reverse('cars'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(performance.get_metrics(), {})
+
+    async def test_async_requests(self):
+        with self.assertLogs('autoservice.middleware', 'INFO') as logs:
+            response = await AsyncClient().get(reverse('cars'))
+        self.assertIn('Server-Timing', response)
+        self.assertGreater(logs.records[-1].performance['db_queries'], 0)
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def generate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                'generate_data', users=3, car_models=2, cars=5, services=4, orders=12, lines_per_order=3,
+                reviews=0.5, batch_size=5, stdout=StringIO(),
+            )
+
+    def test_generate_data(self):
+        self.generate()
+        self.assertEqual(get_user_model().objects.filter(profile__isnull=False).count(), 3)
+        self.assertEqual((CarModel.objects.count(), Car.objects.count(), Service.objects.count()), (2, 5, 4))
+        orders = Order.objects.prefetch_related('order_lines')
+        self.assertEqual(len(orders), 12)
+        for order in orders:
+            lines = order.order_lines.all()
+            self.assertTrue(1 <= len(lines) <= 3)
+            self.assertEqual(order.total_sum, sum(line.quantity * line.price for line in lines))
+            self.assertLessEqual(order.date, timezone.localdate())
+        self.assertTrue(OrderReview.objects.exists())
+        self.assertTrue(DailyOrderStats.objects.exists())
+
+    def test_generate_data_is_reproducible(self):
+        self.generate()
+        first = list(Order.objects.order_by('pk').values_list('status', 'total_sum', 'date'))
+        Order.objects.all().delete()
+        self.generate()
+        self.assertEqual(list(Order.objects.order_by('pk').values_list('status', 'total_sum', 'date')), first)
+
+    def test_benchmark_covers_every_route_and_compares_baseline(self):
+        self.generate()
+        counts, version = get_counts(), get_version(Order)
+        output = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = f'{directory}/baseline.json'
+            call_command('benchmark', repeat=2, warmup=1, save_baseline=baseline, stdout=output)
+            with open(baseline) as file:
+                results = json.load(file)['routes']
+            self.assertIn('user_order_update', results)
+            self.assertIn('update_profile', results)
+            self.assertTrue(all(result['status'] < 400 for result in results.values()))
+
+            results['orders']['queries'] -= 1
+            with open(baseline, 'w') as file:
+                json.dump({'routes': results}, file)
+            with self.assertRaisesMessage(CommandError, 'Regressed: orders.'):
+                call_command('benchmark', 'orders', repeat=2, warmup=1, baseline=baseline, stdout=output)
+        self.assertIn('REGRESSION', output.getvalue())
+        self.assertFalse(get_user_model().objects.filter(username='benchmark').exists())
+        self.assertEqual((get_counts(), get_version(Order)), (counts, version))
+
+
+class UserOrderFormTests(TestCase):
+    def test_car_keeps_model_label(self):
+        create_order()
+        form = UserOrderForm()
+        self.assertEqual(form.fields['car'].label, capfirst(Order._meta.get_field('car').verbose_name))
+        with self.assertNumQueries(1):
+            [label for value, label in form.fields['car'].choices]
@@ -0,0 +1,125 @@
+"""Off-request thumbnails for uploaded images (Car.cover, Profile.photo).
+
+Uploads are saved untouched and a worker thread renders every size in
+THUMBNAIL_SIZES. Derivatives are named after the sha256 of the source content,
+and a small JSON manifest per source maps size names to them. Templates ask
+for a size with the thumbnail filter and get the original until it is ready.
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1, sha256
+from io import BytesIO
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.dispatch import Signal
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+MISSING_MANIFEST_TIMEOUT = 60
+
+# Sent with the model of the image field once its thumbnails are written.
+thumbnails_ready = Signal()
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+    return _executor
+
+
+def image_format():
+    if settings.THUMBNAIL_FORMAT == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return settings.THUMBNAIL_FORMAT
+
+
+def manifest_name(source_name):
+    return f'thumbnails/{sha1(source_name.encode()).hexdigest()}.json'
+
+
+def manifest_cache_key(source_name):
+    return 'thumbnails:' + sha1(source_name.encode()).hexdigest()
+
+
+def get_manifest(source_name, storage=default_storage):
+    key = manifest_cache_key(source_name)
+    manifest = cache.get(key)
+    if manifest is None:
+        name = manifest_name(source_name)
+        if storage.exists(name):
+            with storage.open(name) as manifest_file:
+                manifest = json.load(manifest_file)
+            cache.set(key, manifest, None)
+        else:
+            manifest = {}
+            cache.set(key, manifest, MISSING_MANIFEST_TIMEOUT)
+    return manifest
+
+
+def render(image, size, image_type):
+    thumbnail = image.copy()
+    thumbnail.thumbnail(size)
+    if image_type == 'JPEG' and thumbnail.mode not in ('RGB', 'L'):
+        thumbnail = thumbnail.convert('RGB')
+    output = BytesIO()
+    thumbnail.save(output, format=image_type, quality=settings.THUMBNAIL_QUALITY)
+    return ContentFile(output.getvalue())
+
+
+def generate(source_name, storage=default_storage, sender=None):
+    with storage.open(source_name) as source:
+        data = source.read()
+    digest = sha256(data).hexdigest()[:32]
+    image_type = image_format()
+    image = Image.open(BytesIO(data))
+    image.load()
+    manifest = {}
+    for size_name, size in settings.THUMBNAIL_SIZES.items():
+        name = f'thumbnails/{digest[:2]}/{digest}_{size_name}.{FORMATS[image_type]}'
+        if not storage.exists(name):
+            name = storage.save(name, render(image, size, image_type))
+        manifest[size_name] = name
+    manifest_path = manifest_name(source_name)
+    if storage.exists(manifest_path):
+        storage.delete(manifest_path)
+    storage.save(manifest_path, ContentFile(json.dumps(manifest).encode()))
+    cache.set(manifest_cache_key(source_name), manifest, None)
+    if sender is not None:
+        thumbnails_ready.send(sender=sender, source_name=source_name)
+    return manifest
+
+
+def generate_logged(source_name, sender=None):
+    try:
+        return generate(source_name, sender=sender)
+    except Exception:
+        logger.exception('Could not create thumbnails for %s', source_name)
+
+
+def schedule(field_file):
+    """Queues thumbnails for field_file once the current transaction commits."""
+    if not field_file or get_manifest(field_file.name, field_file.storage):
+        return
+    name, sender = field_file.name, type(field_file.instance)
+    if settings.THUMBNAILS_ASYNC:
+        transaction.on_commit(lambda: get_executor().submit(generate_logged, name, sender))
+    else:
+        transaction.on_commit(lambda: generate_logged(name, sender))
+
+
+def thumbnail_url(field_file, size):
+    if not field_file:
+        return ''
+    name = get_manifest(field_file.name, field_file.storage).get(size)
+    if name:
+        return field_file.storage.url(name)
+    return field_file.url
@@ -1,14 +1,31 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# AUTOSERVICE_ASYNC_VIEWS serves the read-heavy pages from async_views.py.
+if settings.AUTOSERVICE_ASYNC_VIEWS:
+    index, cars, car_info = async_views.index, async_views.cars, async_views.car_info
+    order_list, order_detail = async_views.order_list, async_views.order_detail
+else:
+    index, cars, car_info = views.index, views.cars, views.car_info
+    order_list, order_detail = views.OrderlistView.as_view(), views.OrderDetailView.as_view()
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('cars/', views.cars, name='cars'),
-    path('car/<int:car_id>/', views.car_info, name='car_info'),
-    path('orders/', views.OrderlistView.as_view(), name='orders'),
-    path('order/<int:pk>/', views.OrderDetailView.as_view(), name='order'),
+    path('', index, name='index'),
+    path('cars/', cars, name='cars'),
+    path('car/<int:car_id>/', car_info, name='car_info'),
+    path('orders/', order_list, name='orders'),
+    path('orders/import/', views.import_orders, name='import_orders'),
+    path('orders/export/', views.export_orders, name='export_orders'),
+    path('order/<int:pk>/', order_detail, name='order'),
+    path('order/<int:pk>/reviews/', views.order_reviews, name='order_reviews'),
     path('my_orders/', views.UserOrderListView.as_view(), name='user_orders'),
     path('create_new_order/', views.UserOrderCreateView.as_view(), name='user_order_create'),
     path('update_order/<int:pk>/', views.UserOrderUpdateView.as_view(), name='user_order_update'),
     path('cancel_order/<int:pk>/', views.UserOrderDeleteView.as_view(), name='user_order_delete'),
+    path('reports/orders/', views.report_orders, name='report_orders'),
+    path('reports/revenue/', views.report_revenue, name='report_revenue'),
+    path('reports/overdue/', views.report_overdue, name='report_overdue'),
+    path('cache/metrics/', views.cache_metrics, name='cache_metrics'),
+    path('perf/metrics/', views.performance_metrics, name='performance_metrics'),
 ]
@@ -1,108 +1,211 @@
+import codecs
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse
-from . models import Car, Service, Order
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_POST
+from . models import Car, Order, OrderReview
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.core.paginator import Paginator
-from django.db.models import Q
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic.edit import FormMixin
+from .cache_backends import get_metrics as get_cache_metrics
+from .caching import get_version
+from .counters import get_counts, record_visit
+from .performance import get_metrics as get_performance_metrics
+from .export import FORMATS as EXPORT_FORMATS, export_lines, filter_orders, parse_day
 from .forms import OrderReviewForm, UserOrderForm, UserOrderUpdateForm
+from .importer import ImportRowError, OrderImporter, format_from_name, read_rows
+from .mixins import CachedObjectMixin
+from .pagination import CachedCountPaginator, CursorPaginationMixin, CursorPaginator, cursor_pagination_enabled
+from . import ratelimit
+from .ratelimit import RateLimitMixin
+from . import reports
+from .reviews import ReviewChunk, page_number
+from .search import search_orders
 from django.urls import reverse, reverse_lazy
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 
 def index(request):
     # return HttpResponse("Hello, the autoservice is at Your services!")
-    service_count = Service.objects.count()
-    order_count = Order.objects.count()
-    car_count = Car.objects.count()
-    visits_count = request.session.get('visits_count', 1)
-    request.session['visits_count'] = visits_count + 1
-
-    context = {
-        'service_count' : service_count,
-        'order_count' : order_count,
-        'car_count' : car_count,
-        'visits_count': visits_count,
-    }
+    context = get_counts()
+    context['visits_count'] = record_visit(request)
 
     return render(request, 'autoservice/index.html', context)
 
 def cars(request):
-    paginator = Paginator(Car.objects.all(), 3)
-    page_number = request.GET.get('page')
-    paged_cars = paginator.get_page(page_number)
-    return render(request, 'autoservice/cars.html', {'cars': paged_cars})
+    queryset = Car.objects.select_related('car_model')
+    if cursor_pagination_enabled():
+        paged_cars = CursorPaginator(queryset, 3, ordering=('id', )).page(request.GET.get('cursor'))
+    else:
+        paginator = CachedCountPaginator(queryset.order_by('id'), 3)
+        page_number = request.GET.get('page')
+        paged_cars = paginator.get_page(page_number)
+    return render(request, 'autoservice/cars.html', {'cars': paged_cars, 'cache_version': get_version(Car)})
 
 def car_info(request, car_id):
-    return render(request, 'autoservice/car_info.html', {'car': get_object_or_404(Car, id=car_id)})
+    car = get_object_or_404(Car.objects.select_related('car_model'), id=car_id)
+    return render(request, 'autoservice/car_info.html', {'car': car, 'cache_version': get_version(Car)})
 
-class OrderlistView(ListView):
+@staff_member_required
+def cache_metrics(request):
+    return JsonResponse(get_cache_metrics())
+
+@staff_member_required
+def performance_metrics(request):
+    return JsonResponse(get_performance_metrics())
+
+@staff_member_required
+@require_POST
+def import_orders(request):
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': _('Upload a CSV or JSON Lines file as "file".')}, status=400)
+    file_format = request.POST.get('format') or format_from_name(upload.name)
+    importer = OrderImporter()
+    try:
+        stats = importer.run(read_rows(codecs.iterdecode(upload, 'utf-8'), file_format))
+    except (ImportRowError, ValueError) as error:
+        return JsonResponse({'error': str(error), 'imported': importer.stats}, status=400)
+    return JsonResponse({'imported': stats})
+
+def invalid_dates():
+    return JsonResponse({'error': _('Dates have to be in the YYYY-MM-DD format.')}, status=400)
+
+def invalid_range():
+    return JsonResponse({'error': _('Dates have to be in the YYYY-MM-DD format, from not after to.')}, status=400)
+
+@staff_member_required
+def export_orders(request):
+    file_format = request.GET.get('format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': _('Unknown export format.')}, status=400)
+    try:
+        dates = {name: parse_day(request.GET[name]) for name in ('date_from', 'date_to') if request.GET.get(name)}
+    except ValueError:
+        return invalid_dates()
+    queryset = filter_orders(
+        Order.objects.all(),
+        search=request.GET.get('search'),
+        status=request.GET.get('status'),
+        **dates,
+    )
+    response = StreamingHttpResponse(export_lines(queryset, file_format), content_type=EXPORT_FORMATS[file_format])
+    response['Content-Disposition'] = f'attachment; filename="orders.{file_format}"'
+    return response
+
+@staff_member_required
+def report_orders(request):
+    try:
+        date_from, date_to = reports.date_range(request.GET)
+    except ValueError:
+        return invalid_range()
+    return JsonResponse({'from': date_from, 'to': date_to, 'days': reports.orders_per_day(date_from, date_to)})
+
+@staff_member_required
+def report_revenue(request):
+    try:
+        date_from, date_to = reports.date_range(request.GET)
+    except ValueError:
+        return invalid_range()
+    return JsonResponse({'from': date_from, 'to': date_to, 'services': reports.revenue_per_service(date_from, date_to)})
+
+@staff_member_required
+def report_overdue(request):
+    return JsonResponse({'backlog': reports.overdue_backlog()})
+
+class OrderlistView(CursorPaginationMixin, ListView):
     model = Order
     paginate_by = 3
     template_name = 'autoservice/order_list.html'
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('car').order_by('id')
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(car__owner__icontains=search) | 
-                Q(car__plate_number__icontains=search) | 
-                Q(car__VIN_code__icontains=search)
-                # Q(car_model___model__icontains=search)
-            )
+            queryset = search_orders(queryset, search, ranked=not cursor_pagination_enabled())
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['orders_count'] = self.get_queryset().count()
+        context['orders_count'] = context['paginator'].count
         return context
 
     
-class OrderDetailView(FormMixin,DetailView):
+class OrderDetailView(CachedObjectMixin, FormMixin, DetailView):
     model = Order
     template_name = 'autoservice/order_detail.html'
     form_class = OrderReviewForm
 
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related('order_lines__service')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['review_chunk'] = ReviewChunk(self.object.id, page_number(self.request.GET.get('reviews_page')))
+        if not context['review_chunk'].exists():
+            raise Http404
+        context['reviews_cache_version'] = get_version(OrderReview)
+        return context
+
     def get_success_url(self):
-        return reverse('order', kwargs={'pk': self.get_object().id})
+        return reverse('order', kwargs={'pk': self.object.id})
 
     def post(self, *args, **kwargs):
         self.object = self.get_object()
         form = self.get_form()
         if form.is_valid():
+            seconds = ratelimit.retry_after('review', ratelimit.client_id(self.request))
+            if seconds:
+                return ratelimit.too_many_requests(self.request, seconds)
             return self.form_valid(form)
         else:
-            messages.error(self.request, _("You are commenting too much!"))
+            messages.error(self.request, _("Your comment could not be posted."))
             return self.form_invalid(form)
 
     def form_valid(self, form):
-        form.order = self.get_object()
+        form.order = self.object
         form.owner = self.request.user
         form.save()
+        ratelimit.record('review', ratelimit.client_id(self.request))
         messages.success(self.request, _("Your comment has been posted"))
         return super().form_valid(form)
 
     def get_initial(self):
         return {
-            'order': self.get_object(),
+            'order': self.object,
             'owner': self.request.user,
         }
 
 
+def order_reviews(request, pk):
+    if not Order.objects.filter(pk=pk).exists():
+        raise Http404
+    chunk = ReviewChunk(pk, page_number(request.GET.get('page')))
+    key = f'order_reviews:{pk}:{chunk.page}:{get_version(OrderReview)}'
+    data = cache.get(key)
+    if data is None:
+        # Pages past the last one are not cached, made up page numbers would fill the cache.
+        if not chunk.exists():
+            raise Http404
+        data = chunk.as_dict()
+        cache.set(key, data, 600)
+    return JsonResponse(data)
+
+
 class UserOrderListView(LoginRequiredMixin, ListView):
     model = Order
     template_name = 'autoservice/user_order_list.html'
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        queryset = queryset.filter(reader=self.request.user)
+        queryset = queryset.filter(reader=self.request.user).select_related('car').with_overdue()
         return queryset
 
 
-class UserOrderCreateView(LoginRequiredMixin, CreateView):
+class UserOrderCreateView(LoginRequiredMixin, RateLimitMixin, CreateView):
     model = Order
+    ratelimit_action = 'order_create'
     # fields = ('car', 'estimate_date', )
     form_class = UserOrderForm
     template_name = 'autoservice/user_order_form.html'
@@ -115,7 +218,7 @@ class UserOrderCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class UserOrderUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class UserOrderUpdateView(LoginRequiredMixin, UserPassesTestMixin, CachedObjectMixin, UpdateView):
     model = Order
     # fields = ('car', 'estimate_date')
     form_class = UserOrderUpdateForm
@@ -134,14 +237,14 @@ class UserOrderUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if self.get_object().status == 'n':
+        if self.object.status == 'n':
             context['action'] = _('Pay')
         else:
             context['action'] = _('New')
         return context
 
 
-class UserOrderDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class UserOrderDeleteView(LoginRequiredMixin, UserPassesTestMixin, CachedObjectMixin, DeleteView):
     model = Order
     template_name = 'autoservice/user_order_delete.html'
     success_url = reverse_lazy('user_orders')
@@ -151,8 +254,7 @@ class UserOrderDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return self.request.user == order.reader
 
     def form_valid(self, form):
-        order = self.get_object()
-        if order.status == 'a':
+        if self.object.status == 'a':
             messages.success(self.request, _('Order paid in advanced'))
         else:
             messages.success(self.request, _('Order cancelled.'))
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
+from autoservice.templating import warm_cache
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ptu5_autoservice.settings')
 
 application = get_asgi_application()
+
+if settings.TEMPLATE_WARMUP:
+    warm_cache()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from . import local_settings
 from django.utils.translation import gettext_lazy as _
@@ -45,6 +46,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'autoservice.middleware.PerformanceMiddleware',
+    'autoservice.middleware.ReplicaPinningMiddleware',
+    'autoservice.middleware.TemplateProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -57,12 +61,23 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'ptu5_autoservice.urls'
 
+# TEMPLATE_PROFILE=cached (default) keeps compiled templates in memory, runserver still
+# reloads them on change, uncached parses them on every render
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATE_PROFILES = {
+    'cached': [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
+    'uncached': TEMPLATE_LOADERS,
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_PROFILES[os.environ.get('TEMPLATE_PROFILE', 'cached')],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -79,14 +94,97 @@ WSGI_APPLICATION = 'ptu5_autoservice.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# DB_ENGINE selects sqlite (default), postgresql or pgbouncer. The PostgreSQL
+# profiles need psycopg2 installed; pgbouncer expects transaction pooling.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+POSTGRESQL = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': os.environ.get('DB_NAME', 'autoservice'),
+    'USER': os.environ.get('DB_USER', 'autoservice'),
+    'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+    'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+    'PORT': os.environ.get('DB_PORT', '5432'),
+}
+
+DATABASE_PROFILES = {
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        # Seconds a connection waits for a write lock before "database is locked".
+        'OPTIONS': {'timeout': 20},
+    },
+    'postgresql': POSTGRESQL,
+    'pgbouncer': {
+        **POSTGRESQL,
+        'PORT': os.environ.get('DB_PORT', '6432'),
+        # Server-side cursors do not survive transaction pooling.
+        'DISABLE_SERVER_SIDE_CURSORS': True,
+    },
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        **DATABASE_PROFILES[DB_ENGINE],
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# DB_REPLICAS lists read replicas, SQLite files or PostgreSQL hosts, see autoservice/routers.py
+
+REPLICA_DATABASES = []
+for number, replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME' if DB_ENGINE == 'sqlite' else 'HOST': replica,
+        'TEST': {'MIRROR': 'default'},
     }
+    REPLICA_DATABASES.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['autoservice.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10
+
+# Applied to every new SQLite connection, see autoservice/signals.py
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -20000,
+    'temp_store': 'memory',
+    'mmap_size': 128 * 1024 * 1024,
 }
 
 
+# Cache
+# CACHE_BACKEND selects locmem (default), file or redis, see autoservice/cache_backends.py
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'autoservice.cache_backends.LocMemCache',
+        'LOCATION': 'autoservice',
+    },
+    'file': {
+        'BACKEND': 'autoservice.cache_backends.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / 'cache'),
+    },
+    'redis': {
+        'BACKEND': 'autoservice.cache_backends.RedisCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379'),
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+
+# Anonymous sessions in signed cookies, logged in ones in cached_db, see autoservice/sessions.py
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'autoservice.sessions')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -106,6 +204,25 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# PASSWORD_HASHER_PROFILE=fast hashes passwords with a cheap hasher for load tests,
+# never use it with real accounts.
+
+PASSWORD_HASHER_PROFILES = {
+    'default': [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ],
+    'fast': [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ],
+}
+
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[os.environ.get('PASSWORD_HASHER_PROFILE', 'default')]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.1/topics/i18n/
 
@@ -138,6 +255,57 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = '/'
 
+# Keyset pagination for order and car listings, see autoservice/pagination.py
+AUTOSERVICE_CURSOR_PAGINATION = False
+PAGINATION_COUNT_TIMEOUT = 60
+
+# Async index, car and order pages for ASGI deployments, see autoservice/async_views.py
+AUTOSERVICE_ASYNC_VIEWS = os.environ.get('AUTOSERVICE_ASYNC_VIEWS') == '1'
+
+# Compile all templates when the WSGI or ASGI application starts, see autoservice/templating.py
+TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP') == '1'
+
+# Log the slowest templates and tags per request, see autoservice/middleware.py
+TEMPLATE_PROFILER = os.environ.get('TEMPLATE_PROFILER') == '1'
+TEMPLATE_PROFILER_TOP = 5
+
+# Share of requests timed and added to the perf/metrics/ histograms, 0 turns it off,
+# see autoservice/performance.py
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', 0))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'autoservice': {'handlers': ['console'], 'level': os.environ.get('AUTOSERVICE_LOG_LEVEL', 'INFO')},
+    },
+}
+
+# Home page counters, see autoservice/counters.py
+COUNTER_CACHE_TIMEOUT = 300
+VISITS_FLUSH_EVERY = 10
+
+# Allowed hits per window in seconds, see autoservice/ratelimit.py
+RATE_LIMITS = {
+    'review': (1, 60),
+    'order_create': (10, 60 * 60),
+    'register': (5, 60 * 60),
+}
+
+# Image thumbnails, see autoservice/thumbnails.py
+THUMBNAILS_ASYNC = True
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_FORMAT = 'WEBP'
+THUMBNAIL_QUALITY = 85
+THUMBNAIL_SIZES = {
+    'small': (64, 64),
+    'medium': (300, 300),
+    'large': (500, 500),
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
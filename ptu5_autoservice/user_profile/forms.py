@@ -1,9 +1,67 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django import forms
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
 from . models import Profile
+from . signals import suppress_profile_sync
 
 User = get_user_model()
 
+
+def email_taken(email, exclude_pk=None):
+    # Matches the user_email_unique index on LOWER(email) WHERE email <> ''.
+    users = User.objects.alias(email_lower=Lower('email')).filter(email_lower=email.lower()).exclude(email='')
+    if exclude_pk is not None:
+        users = users.exclude(pk=exclude_pk)
+    return users.exists()
+
+
+class RegistrationForm(forms.Form):
+    username = forms.CharField(max_length=150, validators=[UnicodeUsernameValidator()], error_messages={
+        'required': 'Username not entered or username already exists.',
+    })
+    email = forms.EmailField(error_messages={
+        'required': 'Email not entered or user with this email already exists.',
+        'invalid': 'Invalid email.',
+    })
+    password = forms.CharField(strip=False, required=False)
+    password2 = forms.CharField(strip=False, required=False)
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        if User.objects.filter(username=username).exists():
+            raise forms.ValidationError('Username not entered or username already exists.')
+        return username
+
+    def clean_email(self):
+        email = User.objects.normalize_email(self.cleaned_data['email'])
+        if email_taken(email):
+            raise forms.ValidationError('Email not entered or user with this email already exists.')
+        return email
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('password') or cleaned_data.get('password') != cleaned_data.get('password2'):
+            self.add_error(None, 'Passwords not entered, or do not match.')
+        return cleaned_data
+
+    def save(self):
+        """Creates the user and the profile together, None if a concurrent signup took the name or email."""
+        try:
+            with transaction.atomic(), suppress_profile_sync():
+                user = User.objects.create_user(
+                    username=self.cleaned_data['username'],
+                    email=self.cleaned_data['email'],
+                    password=self.cleaned_data['password'],
+                )
+                Profile.objects.create(user=user)
+        except IntegrityError:
+            self.add_error(None, 'Username or email already exists.')
+            return None
+        return user
+
+
 class UserUpdateForm(forms.ModelForm):
     email = forms.EmailField()
 
@@ -11,9 +69,15 @@ class UserUpdateForm(forms.ModelForm):
         model = User
         fields = ("first_name", "last_name", "email")
 
+    def clean_email(self):
+        email = self.cleaned_data['email']
+        if email_taken(email, exclude_pk=self.instance.pk):
+            raise forms.ValidationError('User with this email already exists.')
+        return email
+
 
 class ProfileUpdateForm(forms.ModelForm):
     
     class Meta:
         model = Profile
-        fields = ("photo",)
\ No newline at end of file
+        fields = ("photo",)
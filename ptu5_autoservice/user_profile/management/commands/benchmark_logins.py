@@ -0,0 +1,68 @@
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from user_profile.models import Profile
+
+
+def old_profile_save(profile):
+    """What Profile.save did before thumbnails, re-opening and resizing the photo on every save."""
+    models.Model.save(profile)
+    if profile.photo:
+        photo = Image.open(profile.photo.path)
+        if photo.width > 500 or photo.height > 500:
+            output_size = (500, 500)
+            photo.thumbnail(output_size)
+            photo.save(profile.photo.path)
+
+
+class Command(BaseCommand):
+    help = 'Measures the cost of the last_login update done on every login, with and without profile re-saving.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--photo-size', type=int, default=800,
+            help='Width of every profile photo, the old code resizes ones over 500 px on the first login.')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root), transaction.atomic():
+                users = self.create_users(options['users'], Path(media_root), options['photo_size'])
+                self.measure('change-aware signals', users, lambda user: None)
+                # What the old save_profile receiver did on every User save.
+                self.measure('re-saving profiles', users, lambda user: old_profile_save(user.profile))
+                transaction.set_rollback(True)
+
+    def create_users(self, count, media_root, photo_size):
+        User = get_user_model()
+        User.objects.bulk_create(
+            User(username=f'benchmark-login-{number}', password='!') for number in range(count)
+        )
+        output = BytesIO()
+        Image.new('RGB', (photo_size, photo_size * 3 // 4), 'red').save(output, format='PNG')
+        (media_root / 'user_profile/photos').mkdir(parents=True)
+        profiles = []
+        for number, user in enumerate(User.objects.filter(username__startswith='benchmark-login-')):
+            name = f'user_profile/photos/benchmark-login-{number}.png'
+            (media_root / name).write_bytes(output.getvalue())
+            profiles.append(Profile(user=user, photo=name))
+        Profile.objects.bulk_create(profiles)
+        return list(User.objects.filter(username__startswith='benchmark-login-'))
+
+    def measure(self, name, users, extra):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            for user in users:
+                update_last_login(None, user)
+                extra(user)
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{name:>22}: {len(users) / elapsed:,.0f} logins/s, '
+            f'{len(context.captured_queries) / len(users):.1f} queries per login'
+        )
@@ -0,0 +1,49 @@
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from user_profile.forms import RegistrationForm
+
+
+class Command(BaseCommand):
+    help = 'Measures signups per second through RegistrationForm against the old row-loading checks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signups', type=int, default=200)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Password hasher: {settings.PASSWORD_HASHERS[0].rsplit('.', 1)[-1]}")
+        with transaction.atomic():
+            self.measure('registration form', options['signups'], self.form_signup)
+            self.measure('old register view', options['signups'], self.old_signup)
+            transaction.set_rollback(True)
+
+    def form_signup(self, username, email):
+        form = RegistrationForm({'username': username, 'email': email, 'password': 'secret', 'password2': 'secret'})
+        if not form.is_valid() or not form.save():
+            raise ValueError(form.errors)
+
+    def old_signup(self, username, email):
+        User = get_user_model()
+        if User.objects.filter(username=username).first() or User.objects.filter(email=email).first():
+            raise ValueError(username)
+        User.objects.create_user(username=username, email=email, password='secret')
+
+    def measure(self, name, count, signup):
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            # Savepoints only show up because the benchmark runs inside a transaction.
+            if not sql.startswith(('SAVEPOINT', 'RELEASE SAVEPOINT')):
+                queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            started = time.perf_counter()
+            for number in range(count):
+                signup(f'benchmark-{name[:3]}-{number}', f'benchmark-{name[:3]}-{number}@example.com')
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{name:>18}: {count / elapsed:,.1f} signups/s, {len(queries) / count:.1f} queries per signup'
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.3 on 2026-10-18 08:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# auth.User belongs to another app, so the index is added directly instead of through AddConstraint.
+EMAIL_UNIQUE = models.UniqueConstraint(Lower('email'), condition=~models.Q(email=''), name='user_email_unique')
+
+
+def add_email_unique(apps, schema_editor):
+    schema_editor.add_constraint(apps.get_model(settings.AUTH_USER_MODEL), EMAIL_UNIQUE)
+
+
+def remove_email_unique(apps, schema_editor):
+    schema_editor.remove_constraint(apps.get_model(settings.AUTH_USER_MODEL), EMAIL_UNIQUE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('user_profile', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_unique, remove_email_unique),
+    ]
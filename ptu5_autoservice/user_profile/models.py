@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from PIL import Image
+from autoservice.thumbnails import schedule as schedule_thumbnails
 
 class Profile(models.Model):
     user = models.OneToOneField(
@@ -14,11 +14,18 @@ class Profile(models.Model):
     def __str__(self) -> str:
         return f"{self.user} profile"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_photo = instance.__dict__.get('photo')
+        return instance
+
+    def has_changed(self):
+        return self._state.adding or self.photo.name != getattr(self, '_loaded_photo', None)
+
     def save(self, *args, **kwargs):
+        photo_changed = self.has_changed()
         super().save(*args, **kwargs)
-        if self.photo:
-            photo = Image.open(self.photo.path)
-            if photo.width > 500 or photo.height > 500:
-                output_size = (500, 500)
-                photo.thumbnail(output_size)
-                photo.save(self.photo.path)
\ No newline at end of file
+        self._loaded_photo = self.photo.name
+        if photo_changed:
+            schedule_thumbnails(self.photo)
\ No newline at end of file
@@ -1,14 +1,39 @@
+import threading
+from contextlib import contextmanager
 from django.db.models.signals import post_save
 from django.contrib.auth import get_user_model
 from django.dispatch import receiver
 from . models import Profile
 
+_state = threading.local()
+
+
+@contextmanager
+def suppress_profile_sync():
+    """Skips the profile signals, e.g. while importing users in bulk."""
+    previous = getattr(_state, 'suppressed', False)
+    _state.suppressed = True
+    try:
+        yield
+    finally:
+        _state.suppressed = previous
+
+
+def profile_sync_suppressed():
+    return getattr(_state, 'suppressed', False)
+
+
 @receiver(post_save, sender=get_user_model())
-def create_profile(sender, instance, created, **kwargs):
-    if created:
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not profile_sync_suppressed():
         Profile.objects.create(user=instance)
 
 
 @receiver(post_save, sender=get_user_model())
-def save_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+def save_profile(sender, instance, created, raw=False, **kwargs):
+    # Only a profile that was loaded through user.profile and then changed needs
+    # saving, plain user saves such as the last_login update on login do not.
+    if created or raw or profile_sync_suppressed():
+        return
+    if sender.profile.is_cached(instance) and instance.profile.has_changed():
+        instance.profile.save()
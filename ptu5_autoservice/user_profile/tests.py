@@ -1,3 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
+from . forms import RegistrationForm
+from . models import Profile
+from . signals import suppress_profile_sync
 
-# Create your tests here.
+User = get_user_model()
+
+
+class ProfileSignalTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('jonas', 'jonas@example.com', 'secret-pass-123')
+
+    def test_profile_created_with_user(self):
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
+
+    def test_login_does_not_save_profile(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.profile
+        with self.assertNumQueries(1):
+            update_last_login(None, user)
+
+    def test_changed_profile_is_saved_with_user(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.profile.photo = 'user_profile/photos/jonas.png'
+        user.save()
+        self.assertEqual(Profile.objects.get(user=user).photo.name, 'user_profile/photos/jonas.png')
+
+    def test_suppressed_signals(self):
+        with suppress_profile_sync():
+            user = User.objects.create_user('petras', 'petras@example.com', 'secret-pass-123')
+        self.assertFalse(Profile.objects.filter(user=user).exists())
+
+
+class RegistrationTests(TestCase):
+    def data(self, **kwargs):
+        return {'username': 'petras', 'email': 'petras@example.com', 'password': 'secret', 'password2': 'secret', **kwargs}
+
+    def test_register_creates_user_and_profile(self):
+        response = self.client.post(reverse('register'), self.data())
+        self.assertRedirects(response, reverse('login'))
+        user = User.objects.get(username='petras')
+        self.assertTrue(user.check_password('secret'))
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+
+    def test_uniqueness_checks(self):
+        User.objects.create_user('jonas', 'Jonas@Example.com', 'secret-pass-123')
+        form = RegistrationForm(self.data(username='jonas', email='jonas@example.COM'))
+        with self.assertNumQueries(2):
+            self.assertFalse(form.is_valid())
+        self.assertEqual(set(form.errors), {'username', 'email'})
+
+    def test_password_mismatch(self):
+        response = self.client.post(reverse('register'), self.data(password2='other'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Passwords not entered, or do not match.')
+        self.assertFalse(User.objects.filter(username='petras').exists())
+
+    def test_concurrent_signup_hits_constraint(self):
+        form = RegistrationForm(self.data())
+        self.assertTrue(form.is_valid())
+        User.objects.create_user('other', 'PETRAS@example.com', 'secret-pass-123')
+        self.assertIsNone(form.save())
+        self.assertFalse(User.objects.filter(username='petras').exists())
+        self.assertIn('Username or email already exists.', form.non_field_errors())
+
+    def test_email_index_ignores_case_and_blanks(self):
+        User.objects.create_user('first', '', 'secret-pass-123')
+        User.objects.create_user('second', '', 'secret-pass-123')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user('third', 'Same@example.com', 'secret-pass-123')
+            User.objects.create_user('fourth', 'same@example.com', 'secret-pass-123')